@@ -1,10 +1,26 @@
+import asyncio
 import re
 import requests
+import threading
 import time
 import logging
 import os
+import orjson
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import Optional, List, Dict, Literal
 from dotenv import load_dotenv
+from urllib3.util.retry import Retry
+
+try:
+    import ijson  # optional: incremental parsing of large MCP replies
+except ImportError:
+    ijson = None
+
+try:
+    from src.grafana_cloud import grafana_exporter
+except ImportError:
+    grafana_exporter = None
 
 # Observability imports
 from src.observability import (
@@ -15,8 +31,16 @@ from src.observability import (
     FailureReason,
     QueryType,
     MCPStatus,
+    MCPResult,
     LLMModel,
     record_llm_usage,
+    record_node_result,
+)
+from src.performance_analyzer import (
+    summarize_student,
+    detect_trend,
+    derived_metrics,
+    class_report,
 )
 
 load_dotenv()
@@ -27,6 +51,21 @@ logger = logging.getLogger("langgraph_agent")
 # Initialize Groq client for Intent Node
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")  # Your Groq key
 groq_client = None
+# Intent parsing is a small classification task; the 8b model answers it well
+# and much faster. The 70b model is only consulted when the 8b reply is unusable.
+GROQ_INTENT_MODEL = os.getenv("GROQ_INTENT_MODEL", "llama-3.1-8b-instant")
+GROQ_INTENT_FALLBACK_MODEL = os.getenv(
+    "GROQ_INTENT_FALLBACK_MODEL", "llama-3.3-70b-versatile"
+)
+INTENT_QUERY_TYPES = ("single_student", "trend", "derived_metrics", "class_summary")
+# Short rubric for the intent call; the query is sent as the user message.
+# Keep it free of per-request values so every call shares the same prompt
+# prefix (providers that cache prompt prefixes can then reuse it).
+INTENT_SYSTEM_PROMPT = (
+    "Classify query. Return JSON {query_type,student_id}. "
+    "Types: single_student|trend|derived_metrics|class_summary. "
+    "student_id=24-hex or null."
+)
 
 if GROQ_API_KEY:
     try:
@@ -45,10 +84,64 @@ else:
     logger.info("Intent Node: No GROQ_API_KEY found, using heuristic fallback only")
 
 
+# AsyncGroq client for intent_node_async, created on first use inside the loop
+_async_groq_client = None
+
+
+def _get_async_groq():
+    global _async_groq_client
+    if _async_groq_client is None:
+        from groq import AsyncGroq
+        import httpx
+
+        _async_groq_client = AsyncGroq(
+            api_key=GROQ_API_KEY, http_client=httpx.AsyncClient()
+        )
+    return _async_groq_client
+
+
+# Shared keep-alive session for MCP calls: one TCP connection per host is
+# reused across requests instead of reconnecting on every call
+http_session = requests.Session()
+http_session.headers.update({"Content-Type": "application/json"})
+# Retry only failed connects (urllib3 never retries a POST that was sent)
+_http_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, connect=2, read=0, backoff_factor=0.1),
+)
+http_session.mount("http://", _http_adapter)
+http_session.mount("https://", _http_adapter)
+
+
+def get_mcp_session() -> requests.Session:
+    """Return the session MCP calls go through (patch its `post` to mock MCP)."""
+    return http_session
+
+
+def warmup(mcp_url: Optional[str] = None, timeout: float = 5.0) -> None:
+    """Open the LLM and MCP connection pools before the first real request.
+
+    Listing Groq models completes the TLS handshake without spending tokens;
+    pinging the MCP health endpoint opens a keep-alive socket to it.
+    """
+    if groq_client:
+        try:
+            groq_client.models.list()
+            logger.info("Intent Node: Groq connection warmed up")
+        except Exception as e:
+            logger.warning(f"Intent Node: Groq warmup failed: {e}")
+    if mcp_url:
+        try:
+            http_session.get(f"{mcp_url}/health", timeout=timeout)
+        except Exception as e:
+            logger.warning(f"MCP warmup failed: {e}")
+
+
 # State design as required
-def make_initial_state(raw_input: str) -> dict:
+def make_initial_state(raw_input: str, student_id: Optional[str] = None) -> dict:
     return {
-        "request": {"raw_input": raw_input, "student_id": None, "fields": []},
+        "request": {"raw_input": raw_input, "student_id": student_id, "fields": []},
         "mongo_result": None,
         "final_response": None,
         "error": None,
@@ -56,156 +149,248 @@ def make_initial_state(raw_input: str) -> dict:
     }
 
 
-# Intent / Reasoning Node (LLM-powered with query-type detection)
-def intent_node(state: dict, trace_id: Optional[str] = None) -> dict:
-    node = "Intent Node"
-    node_type = NodeType.INTENT
+# Heuristic patterns for the Intent Node, compiled once at import
+_SID_LABELED_RE = re.compile(r"id\s*[:=]\s*([0-9a-fA-F]{24})", re.IGNORECASE)
+_SID_STUDENT_RE = re.compile(r"student\s+([0-9a-fA-F]{24})", re.IGNORECASE)
+_SID_BARE_RE = re.compile(r"\b([0-9a-fA-F]{24})\b")
+_TOP_RE = re.compile(r"top\s+(\d+)", re.IGNORECASE)
+_PAGE_RE = re.compile(r"page\s+(\d+)", re.IGNORECASE)
+_ATRISK_RE = re.compile(r"at[- ]?risk|struggl", re.IGNORECASE)
+_GRADE_RE = re.compile(r"grade\s*(?:>=|>=\s*)?(\d+)", re.IGNORECASE)
+# Query-type keywords (substring matches), one named group per category so a
+# single scan finds every category present; ties go by this priority order
+_INTENT_PRIORITY = ("class_summary", "trend", "derived_metrics")
+_INTENT_KW_RE = re.compile(
+    r"(?P<class_summary>class|all students|dataset|ranking|summary statistics)"
+    r"|(?P<trend>trend|growth|improving|declining|progress)"
+    r"|(?P<derived_metrics>alert|risk|metric|derived|behavior|check)",
+    re.IGNORECASE,
+)
 
-    # Start observability
-    metrics.agent_active_requests += 1
-    span = tracer.start_span("agent.intent", trace_id=trace_id)
-    span.set_attribute("query_length", len(state["request"]["raw_input"]))
 
-    start = time.time()
-    raw = state["request"]["raw_input"].strip()
+# LRU of LLM intent classifications, keyed on the normalized query with any
+# student id masked so one entry serves every student
+_INTENT_CACHE: "OrderedDict[str, dict]" = OrderedDict()
+_INTENT_CACHE_MAX = 2048
+_intent_cache_lock = threading.Lock()
 
-    # Try LLM first for full understanding
-    if groq_client:
+
+def _intent_cache_key(raw: str) -> str:
+    # Case and runs of whitespace don't change the classification
+    return _SID_BARE_RE.sub("<id>", " ".join(raw.lower().split()))
+
+
+def _classify_with_llm(raw: str):
+    """Ask the intent model, falling back to the larger model on an unusable reply.
+
+    Returns the parsed JSON object and the model that produced it.
+    """
+    models = _intent_models()
+    for i, model in enumerate(models):
         try:
-            prompt = f"""You are an expert at understanding student performance queries.
-            
-Analyze this query and extract:
-1. Query type: one of [single_student, trend, derived_metrics, class_summary]
-2. Student ID: 24-hex MongoDB ObjectId if mentioned, otherwise null
-
-Query: "{raw}"
-
-Guidelines:
-- "Summarize", "show", "get info", "performance" for a single student → single_student
-- "Trend", "growth", "improving", "declining" → trend
-- "Alert", "risk", "metric", "check", "behavior" → derived_metrics
-- "Class", "all students", "dataset", "ranking", "summary statistics" → class_summary
-- Extract student IDs like: 689cef602490264c7f2dd235
-
-Respond ONLY with JSON (no markdown, no extra text):
-{{"query_type": "single_student|trend|derived_metrics|class_summary", "student_id": "24-hex-id or null"}}"""
-
-            completion = groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                max_tokens=200,
-                messages=[{"role": "user", "content": prompt}],
+            completion = groq_client.chat.completions.create(**_intent_request(model, raw))
+            return _parse_intent_reply(completion), model
+        except Exception as e:
+            if i == len(models) - 1:
+                raise
+            logger.warning(f"Intent Node - {model} reply unusable: {e}, retrying")
+
+
+async def _classify_with_llm_async(raw: str):
+    """Async twin of _classify_with_llm on the AsyncGroq client."""
+    client = _get_async_groq()
+    models = _intent_models()
+    for i, model in enumerate(models):
+        try:
+            completion = await client.chat.completions.create(
+                **_intent_request(model, raw)
             )
-            response_text = completion.choices[0].message.content.strip()
+            return _parse_intent_reply(completion), model
+        except Exception as e:
+            if i == len(models) - 1:
+                raise
+            logger.warning(f"Intent Node - {model} reply unusable: {e}, retrying")
+
+
+def _intent_models() -> List[str]:
+    models = [GROQ_INTENT_MODEL]
+    if GROQ_INTENT_FALLBACK_MODEL and GROQ_INTENT_FALLBACK_MODEL != GROQ_INTENT_MODEL:
+        models.append(GROQ_INTENT_FALLBACK_MODEL)
+    return models
+
+
+def _intent_request(model: str, raw: str) -> dict:
+    return dict(
+        model=model,
+        max_tokens=120,
+        temperature=0,
+        # JSON mode: the reply is a bare object, no fences to strip
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": INTENT_SYSTEM_PROMPT},
+            {"role": "user", "content": raw},
+        ],
+    )
 
-            # Try to parse JSON (handle markdown code blocks if returned)
-            import json
 
-            if "```" in response_text:
-                response_text = (
-                    response_text.split("```")[1].replace("json", "").strip()
-                )
+def _parse_intent_reply(completion) -> dict:
+    result = orjson.loads(completion.choices[0].message.content)
+    if result.get("query_type") not in INTENT_QUERY_TYPES:
+        raise ValueError(f"unknown query_type {result.get('query_type')!r}")
+    return result
+
+
+def _intent_cache_get(raw: str) -> Optional[dict]:
+    cache_key = _intent_cache_key(raw)
+    with _intent_cache_lock:
+        result = _INTENT_CACHE.get(cache_key)
+        if result is not None:
+            _INTENT_CACHE.move_to_end(cache_key)
+    if result is None:
+        metrics.inc("intent_cache_misses")
+        return None
+    metrics.inc("intent_cache_hits")
+    # Only the classification is cached; take the id from the text
+    sid_match = _SID_BARE_RE.search(raw)
+    return dict(result, student_id=sid_match and sid_match.group(1))
+
+
+def _intent_cache_put(raw: str, result: dict):
+    with _intent_cache_lock:
+        _INTENT_CACHE[_intent_cache_key(raw)] = {
+            "query_type": result["query_type"],
+            "analysis_opts": result.get("analysis_opts", {}),
+        }
+        if len(_INTENT_CACHE) > _INTENT_CACHE_MAX:
+            _INTENT_CACHE.popitem(last=False)
 
-            result = json.loads(response_text)
-            state["query_type"] = result.get("query_type", "single_student")
-            state["request"]["student_id"] = result.get("student_id")
-            # Optionally LLM may return analysis options
-            state["analysis_opts"] = result.get("analysis_opts", {})
-
-            needs_analysis = state["query_type"] in [
-                "trend",
-                "derived_metrics",
-                "class_summary",
-            ] or (
-                state["query_type"] == "single_student"
-                and state["request"]["student_id"]
-            )
-            duration = time.time() - start
 
-            # Record LLM success metrics
-            metrics.increment_counter(metrics.llm_calls_total, LLMModel.LLAMA_70B)
-            metrics.record_simple_histogram(metrics.llm_latency_seconds, duration)
+def _intent_begin(state: dict, trace_id: Optional[str]):
+    """Open the intent span and run the cheap keyword pass.
 
-            # Record request metric
-            query_type = state.get("query_type", "unknown")
-            metrics.increment_counter(metrics.agent_requests_total, query_type)
+    Exactly one matching category, or a bare student id with no keywords,
+    is unambiguous: `confident` then means the LLM can be skipped.
+    """
+    metrics.inc("agent_active_requests")
+    span = tracer.start_span("agent.intent", trace_id=trace_id)
+    span.set_attribute("query_length", len(state["request"]["raw_input"]))
 
-            # Record latency
-            metrics.record_histogram(
-                metrics.agent_latency_seconds, node_type.value, duration
-            )
+    raw = state["request"]["raw_input"].strip()
+    found = {m.lastgroup for m in _INTENT_KW_RE.finditer(raw)}
+    kw_types = [qt for qt in _INTENT_PRIORITY if qt in found]
+    confident = len(kw_types) == 1 or (
+        not kw_types
+        and bool(state["request"]["student_id"] or _SID_BARE_RE.search(raw))
+    )
+    return span, raw, kw_types, confident
 
-            # End span
-            span.set_attribute("query_type", query_type)
-            span.set_attribute("parsed_by", "llm")
-            tracer.end_span(span)
-            metrics.agent_active_requests -= 1
 
-            logger.info(
-                f"{node} - parsed (LLM) - query_type={state['query_type']} - student_id={state['request']['student_id']} - needs_analysis={needs_analysis} - duration={duration:.4f}s"
-            )
-            state["intent"] = {"needs_db": True, "needs_analysis": needs_analysis}
-            return state
+def _intent_llm_failed(e: Exception):
+    node = "Intent Node"
+    # Record LLM failure
+    metrics.increment_counter(metrics.llm_failures_total, FailureReason.LLM_PARSE.value)
+    logger.warning(f"{node} - LLM parsing failed: {e}, falling back to heuristic")
+
+
+def _intent_from_llm(
+    state: dict, result: dict, model: Optional[str], span: Span, start: float
+) -> dict:
+    """Apply an LLM (or cached) classification to state and record it."""
+    node = "Intent Node"
+    node_type = NodeType.INTENT
+
+    state["query_type"] = result.get("query_type", "single_student")
+    # An id extracted by the caller is deterministic; keep it over the LLM's
+    state["request"]["student_id"] = state["request"]["student_id"] or result.get(
+        "student_id"
+    )
+    # Optionally LLM may return analysis options
+    state["analysis_opts"] = result.get("analysis_opts", {})
+
+    needs_analysis = state["query_type"] in [
+        "trend",
+        "derived_metrics",
+        "class_summary",
+    ] or (state["query_type"] == "single_student" and state["request"]["student_id"])
+    duration = time.perf_counter() - start
+
+    # Record LLM success metrics
+    if model:
+        metrics.increment_counter(
+            metrics.llm_calls_total,
+            LLMModel.LLAMA_8B if "8b" in model else LLMModel.LLAMA_70B,
+        )
+        metrics.record_simple_histogram(metrics.llm_latency_seconds, duration)
+
+    # Record request, latency and span
+    query_type = state.get("query_type", "unknown")
+    parsed_by = "llm" if model else "cache"
+    record_node_result(
+        span,
+        node_type,
+        duration,
+        query_type=query_type,
+        extra={
+            "query_type": query_type,
+            "parsed_by": parsed_by,
+            "intent_path": parsed_by,
+        },
+    )
+    if grafana_exporter is not None:
+        grafana_exporter.record_agent_query(query_type, parsed_by)
+    metrics.inc("agent_active_requests", -1)
+
+    logger.info(
+        "%s - parsed (%s) - query_type=%s - student_id=%s - needs_analysis=%s - duration=%.4fs",
+        node,
+        parsed_by.upper(),
+        state['query_type'],
+        state['request']['student_id'],
+        needs_analysis,
+        duration,
+    )
+    state["intent"] = {"needs_db": True, "needs_analysis": needs_analysis}
+    return state
 
-        except Exception as e:
-            # Record LLM failure
-            metrics.increment_counter(
-                metrics.llm_failures_total, FailureReason.LLM_PARSE.value
-            )
-            logger.warning(
-                f"{node} - LLM parsing failed: {e}, falling back to heuristic"
-            )
 
-    # Fallback: heuristic-based detection
-    query_type = "single_student"  # default
-    if any(
-        kw in raw.lower()
-        for kw in [
-            "class",
-            "all students",
-            "dataset",
-            "ranking",
-            "summary statistics",
-            "analyze class",
-        ]
-    ):
-        query_type = "class_summary"
-    elif any(
-        kw in raw.lower()
-        for kw in ["trend", "growth", "improving", "declining", "progress"]
-    ):
-        query_type = "trend"
-    elif any(
-        kw in raw.lower()
-        for kw in ["alert", "risk", "metric", "derived", "behavior", "check"]
-    ):
-        query_type = "derived_metrics"
-
-    # Extract student ID from patterns
-    # Pattern 1: "id: <24-hex>" or "id=<24-hex>"
-    sid_match = re.search(r"id\s*[:=]\s*([0-9a-fA-F]{24})", raw, re.IGNORECASE)
-    # Pattern 2: "student <24-hex>"
-    if not sid_match:
-        sid_match = re.search(r"student\s+([0-9a-fA-F]{24})", raw, re.IGNORECASE)
-    # Pattern 3: standalone 24-hex string (most common)
-    if not sid_match:
-        sid_match = re.search(r"\b([0-9a-fA-F]{24})\b", raw)
+def _intent_from_heuristic(
+    state: dict, raw: str, kw_types: list, confident: bool, span: Span, start: float
+) -> dict:
+    """Classify with keywords/regexes (no LLM) and record it."""
+    node = "Intent Node"
+    node_type = NodeType.INTENT
+
+    # Heuristic-based detection (first matching category wins)
+    query_type = kw_types[0] if kw_types else "single_student"
+
+    # Extract student ID from patterns (unless the caller already did)
+    sid_match = None
+    if state["request"]["student_id"] is None:
+        # Pattern 1: "id: <24-hex>" or "id=<24-hex>"
+        sid_match = _SID_LABELED_RE.search(raw)
+        # Pattern 2: "student <24-hex>"
+        if not sid_match:
+            sid_match = _SID_STUDENT_RE.search(raw)
+        # Pattern 3: standalone 24-hex string (most common)
+        if not sid_match:
+            sid_match = _SID_BARE_RE.search(raw)
 
     if sid_match:
         state["request"]["student_id"] = sid_match.group(1)
-        logger.info(f"{node} - extracted student_id: {sid_match.group(1)[:12]}...")
+        logger.info("%s - extracted student_id: %.12s...", node, sid_match.group(1))
 
     state["query_type"] = query_type
     # Parse simple options: top N, page, at-risk, grade threshold
     opts = {}
-    top_match = re.search(r"top\s+(\d+)", raw, re.IGNORECASE)
-    page_match = re.search(r"page\s+(\d+)", raw, re.IGNORECASE)
+    top_match = _TOP_RE.search(raw)
+    page_match = _PAGE_RE.search(raw)
     if top_match:
         opts["top_n"] = int(top_match.group(1))
     if page_match:
         opts["page"] = int(page_match.group(1))
-    if re.search(r"at[- ]?risk|struggl", raw, re.IGNORECASE):
+    if _ATRISK_RE.search(raw):
         opts["at_risk_only"] = True
-    thr = re.search(r"grade\s*(?:>=|>=\s*)?(\d+)", raw, re.IGNORECASE)
+    thr = _GRADE_RE.search(raw)
     if thr:
         opts["grade_threshold"] = int(thr.group(1))
     state["analysis_opts"] = opts
@@ -213,31 +398,100 @@ Respond ONLY with JSON (no markdown, no extra text):
     needs_analysis = query_type in ["trend", "derived_metrics", "class_summary"] or (
         query_type == "single_student" and state["request"]["student_id"]
     )
-    duration = time.time() - start
+    duration = time.perf_counter() - start
 
-    # Record fallback/heuristic parsing metrics
+    # Record fallback/heuristic parsing metrics and span
     query_type_key = query_type if query_type else "unknown"
-    metrics.increment_counter(metrics.agent_requests_total, query_type_key)
-    metrics.record_histogram(metrics.agent_latency_seconds, node_type.value, duration)
-
-    # End span with fallback info
-    span.set_attribute("query_type", query_type_key)
-    span.set_attribute("parsed_by", "heuristic")
-    tracer.end_span(span)
-    metrics.agent_active_requests -= 1
+    parsed_by = "heuristic_confident" if confident else "heuristic"
+    intent_path = "fast" if confident else "fallback"
+    record_node_result(
+        span,
+        node_type,
+        duration,
+        query_type=query_type_key,
+        extra={
+            "query_type": query_type_key,
+            "parsed_by": parsed_by,
+            "intent_path": intent_path,
+        },
+    )
+    if grafana_exporter is not None:
+        grafana_exporter.record_agent_query(query_type_key, intent_path)
+    metrics.inc("agent_active_requests", -1)
 
     logger.info(
-        f"{node} - parsed (fallback) - query_type={query_type} - student_id={state['request']['student_id']} - needs_analysis={needs_analysis} - duration={duration:.4f}s"
+        "%s - parsed (%s) - query_type=%s - student_id=%s - needs_analysis=%s - duration=%.4fs",
+        node,
+        parsed_by,
+        query_type,
+        state['request']['student_id'],
+        needs_analysis,
+        duration,
     )
     state["intent"] = {"needs_db": True, "needs_analysis": needs_analysis}
     return state
 
 
+# Intent / Reasoning Node (LLM-powered with query-type detection)
+def intent_node(state: dict, trace_id: Optional[str] = None) -> dict:
+    start = time.perf_counter()
+    span, raw, kw_types, confident = _intent_begin(state, trace_id)
+
+    # Ask the LLM only when the heuristic is ambiguous
+    if groq_client and confident:
+        metrics.inc("intent_llm_skipped_total")
+    elif groq_client:
+        try:
+            result, model = _intent_cache_get(raw), None
+            if result is None:
+                result, model = _classify_with_llm(raw)
+                _intent_cache_put(raw, result)
+            return _intent_from_llm(state, result, model, span, start)
+        except Exception as e:
+            _intent_llm_failed(e)
+
+    return _intent_from_heuristic(state, raw, kw_types, confident, span, start)
+
+
+async def intent_node_async(state: dict, trace_id: Optional[str] = None) -> dict:
+    """intent_node that awaits the Groq call instead of blocking on it."""
+    start = time.perf_counter()
+    span, raw, kw_types, confident = _intent_begin(state, trace_id)
+
+    if groq_client and confident:
+        metrics.inc("intent_llm_skipped_total")
+    elif groq_client:
+        try:
+            result, model = _intent_cache_get(raw), None
+            if result is None:
+                result, model = await _classify_with_llm_async(raw)
+                _intent_cache_put(raw, result)
+            return _intent_from_llm(state, result, model, span, start)
+        except Exception as e:
+            _intent_llm_failed(e)
+
+    return _intent_from_heuristic(state, raw, kw_types, confident, span, start)
+
+
 # Deterministic Validation Node
 ALLOWED_FIELDS = {"name", "age", "sex", "G3"}
 OBJID_RE = re.compile(r"^[0-9a-fA-F]{24}$")
 
 
+def _is_objid(s: str) -> bool:
+    """True if s is a 24-char hex ObjectId.
+
+    bytes.fromhex does the alphabet check in one C loop. It tolerates
+    whitespace between byte pairs, hence the decoded-length check.
+    """
+    if len(s) != 24:
+        return False
+    try:
+        return len(bytes.fromhex(s)) == 12
+    except ValueError:
+        return False
+
+
 def validation_node(state: dict, parent_span_id: Optional[str] = None) -> dict:
     node = "Validation Node"
     node_type = NodeType.VALIDATION
@@ -246,7 +500,7 @@ def validation_node(state: dict, parent_span_id: Optional[str] = None) -> dict:
     span = tracer.start_span("agent.validation", parent_id=parent_span_id)
     span.set_attribute("query_type", state.get("query_type", "unknown"))
 
-    start = time.time()
+    start = time.perf_counter()
     req = state["request"]
     query_type = state.get("query_type", "single_student")
 
@@ -257,88 +511,72 @@ def validation_node(state: dict, parent_span_id: Optional[str] = None) -> dict:
     if query_type in ["single_student", "trend", "derived_metrics"]:
         if sid is None:
             state["error"] = "missing student_id for this query type"
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record validation failure
-            metrics.increment_counter(
-                metrics.agent_failures_total,
-                f"{node_type.value}:{FailureReason.VALIDATION.value}",
-            )
-            metrics.record_histogram(
-                metrics.agent_latency_seconds, node_type.value, duration
+            record_node_result(
+                span, node_type, duration, "invalid", failure=FailureReason.VALIDATION
             )
-            span.set_status("error")
-            tracer.end_span(span)
 
             logger.info(
-                f"{node} - invalid - reason=missing_id - duration={duration:.4f}s"
+                "%s - invalid - reason=missing_id - duration=%.4fs",
+                node,
+                duration,
             )
             return state
 
-        if not OBJID_RE.match(sid):
+        if not _is_objid(sid):
             state["error"] = "invalid student_id format"
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record validation failure
-            metrics.increment_counter(
-                metrics.agent_failures_total,
-                f"{node_type.value}:{FailureReason.VALIDATION.value}",
+            record_node_result(
+                span, node_type, duration, "invalid", failure=FailureReason.VALIDATION
             )
-            metrics.record_histogram(
-                metrics.agent_latency_seconds, node_type.value, duration
-            )
-            span.set_status("error")
-            tracer.end_span(span)
 
             logger.info(
-                f"{node} - invalid - reason=student_id_format - duration={duration:.4f}s"
+                "%s - invalid - reason=student_id_format - duration=%.4fs",
+                node,
+                duration,
             )
             return state
 
     # For class_summary: no student_id needed
     if query_type == "class_summary":
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record success
-        metrics.record_histogram(
-            metrics.agent_latency_seconds, node_type.value, duration
-        )
-        tracer.end_span(span)
+        record_node_result(span, node_type, duration)
 
-        logger.info(f"{node} - success (class_summary) - duration={duration:.4f}s")
+        logger.info("%s - success (class_summary) - duration=%.4fs", node, duration)
         return state
 
     # Validate fields if provided
     invalid = [f for f in fields if f not in ALLOWED_FIELDS]
     if invalid:
         state["error"] = f"invalid fields requested: {invalid}"
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record validation failure
-        metrics.increment_counter(
-            metrics.agent_failures_total,
-            f"{node_type.value}:{FailureReason.VALIDATION.value}",
-        )
-        metrics.record_histogram(
-            metrics.agent_latency_seconds, node_type.value, duration
+        record_node_result(
+            span, node_type, duration, "invalid", failure=FailureReason.VALIDATION
         )
-        span.set_status("error")
-        tracer.end_span(span)
 
         logger.info(
-            f"{node} - invalid - reason=fields_whitelist - duration={duration:.4f}s"
+            "%s - invalid - reason=fields_whitelist - duration=%.4fs",
+            node,
+            duration,
         )
         return state
 
     # Normalize: lowercase and dedupe
     state["request"]["fields"] = list(dict.fromkeys(fields))
-    duration = time.time() - start
+    duration = time.perf_counter() - start
 
     # Record success
-    metrics.record_histogram(metrics.agent_latency_seconds, node_type.value, duration)
-    tracer.end_span(span)
+    record_node_result(span, node_type, duration)
 
-    logger.info(f"{node} - success - duration={duration:.4f}s")
+    logger.info("%s - success - duration=%.4fs", node, duration)
     return state
 
 
@@ -354,199 +592,517 @@ def route_intent(state: dict) -> Literal["mongo", "analysis", "respond", "error"
     return "respond"
 
 
+# Fields every per-student analysis may read from the MCP server
+STUDENT_FIELDS = [
+    "name",
+    "G1",
+    "G2",
+    "G3",
+    "studytime",
+    "absences",
+    "failures",
+    "goout",
+    "Dalc",
+    "Walc",
+]
+# Projection each analysis actually reads; anything else gets STUDENT_FIELDS
+_FIELDS_BY_TYPE = {
+    "single_student": ["G1", "G2", "G3", "studytime"],
+    "trend": ["G1", "G2", "G3"],
+    "derived_metrics": ["G3", "studytime", "absences", "failures", "goout", "Dalc", "Walc"],
+}
+
+
+def _fields_for(query_type: Optional[str]) -> List[str]:
+    return _FIELDS_BY_TYPE.get(query_type, STUDENT_FIELDS)
+
+
+# Simple in-memory cache for student queries, shared by sync and async calls
+# (LRU order: least recently used first; timestamps are monotonic)
+# Keyed by (student_id, projected fields)
+_MCP_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_MCP_CACHE_TTL = 60.0
+_MCP_CACHE_MAX = 200
+# Guards _MCP_CACHE: requests may run on several threads at once
+_MCP_CACHE_LOCK = threading.Lock()
+
+
+def _get_cache(key):
+    with _MCP_CACHE_LOCK:
+        entry = _MCP_CACHE.get(key)
+        if not entry:
+            return None
+        ts, val = entry
+        if time.monotonic() - ts > _MCP_CACHE_TTL:
+            del _MCP_CACHE[key]
+            return None
+        _MCP_CACHE.move_to_end(key)
+        return val
+
+
+def _set_cache(key, val):
+    with _MCP_CACHE_LOCK:
+        if key in _MCP_CACHE:
+            _MCP_CACHE.move_to_end(key)
+        elif len(_MCP_CACHE) >= _MCP_CACHE_MAX:
+            # evict least recently used
+            _MCP_CACHE.popitem(last=False)
+        _MCP_CACHE[key] = (time.monotonic(), val)
+
+
+def _mcp_prepare(state: dict, span: Span, start: float, cache: Optional[dict]):
+    """Resolve a cached record or build the MCP call for this state.
+
+    Returns None when the request was served from cache (state is already
+    filled in), otherwise the (path, payload) to POST.
+    """
+    node = "Mongo MCP Tool Node (client)"
+
+    # For class_summary, use class_analysis endpoint
+    if state.get("query_type", "single_student") == "class_summary":
+        return "/class_analysis", {"limit": 500}
+
+    # For single queries, use query endpoint
+    sid = state["request"].get("student_id")
+    fields = _fields_for(state.get("query_type"))
+    # Try the caller's per-run cache (full records) first, then the shared
+    # TTL cache, which is keyed by projection so records never collide
+    cached = cache.get(sid) if cache is not None else None
+    if cached is None:
+        cached = _get_cache((sid, tuple(fields)))
+    if cached is not None:
+        state["mongo_result"] = cached
+
+        # Record cache hit
+        metrics.inc("cache_hits")
+        span.set_attribute("cache_hit", True)
+        tracer.end_span(span)
+
+        logger.info(
+            "%s - cache_hit - student_id=%s - duration=%.4fs",
+            node,
+            sid,
+            time.perf_counter() - start,
+        )
+        return None
+
+    # Record cache miss
+    metrics.inc("cache_misses")
+    span.set_attribute("cache_hit", False)
+
+    return "/query", {"student_id": sid, "fields": fields}
+
+
+def _mcp_record_response(
+    state: dict, r, path: str, span: Span, start: float, cache: Optional[dict]
+) -> dict:
+    """Store an MCP reply (requests or httpx response) on state and record it."""
+    body = orjson.loads(r.content) if r.status_code == 200 else None
+    return _mcp_record_result(state, r.status_code, body, r.text, path, span, start, cache)
+
+
+def _mcp_record_result(
+    state: dict,
+    status_code: int,
+    body: Optional[dict],
+    error_text: str,
+    path: str,
+    span: Span,
+    start: float,
+    cache: Optional[dict],
+) -> dict:
+    node = "Mongo MCP Tool Node (client)"
+    duration = time.perf_counter() - start
+
+    if status_code == 200:
+        if path == "/class_analysis":
+            state["mongo_result"] = body.get("students", [])
+
+            # Record MCP success metrics
+            metrics.record_mcp(MCPResult(MCPStatus.SUCCESS.value, duration))
+            span.set_attribute("mcp_status", "success")
+            span.set_attribute("student_count", body.get("count", 0))
+            tracer.end_span(span)
+
+            logger.info(
+                "%s - class_analysis - count=%s - duration=%.4fs",
+                node,
+                body.get('count', 0),
+                duration,
+            )
+            return state
+
+        sid = state["request"].get("student_id")
+        state["mongo_result"] = body.get("result")
+        if state["mongo_result"] is not None:
+            fields = _fields_for(state.get("query_type"))
+            _set_cache((sid, tuple(fields)), state["mongo_result"])
+            if cache is not None and fields is STUDENT_FIELDS:
+                cache[sid] = state["mongo_result"]
+        outcome = "empty" if body.get("result") is None else "success"
+
+        # Record MCP success
+        metrics.record_mcp(MCPResult(MCPStatus.SUCCESS.value, duration))
+        span.set_attribute("mcp_status", outcome)
+        span.set_attribute("found", body.get("result") is not None)
+        tracer.end_span(span)
+
+        logger.info("%s - %s - duration=%.4fs", node, outcome, duration)
+        return state
+
+    state["error"] = f"MCP error: {status_code} {error_text}"
+
+    # Record MCP error
+    status_key = (
+        MCPStatus.ERROR.value if status_code >= 500 else MCPStatus.VALIDATION_REJECT.value
+    )
+    metrics.record_mcp(
+        MCPResult(status_key, duration, rejected=f"http_{status_code}")
+    )
+    span.set_attribute("mcp_status", "error")
+    span.set_attribute("http_status", status_code)
+    span.set_status("error")
+    tracer.end_span(span)
+
+    logger.info("%s - error - status=%s - duration=%.4fs", node, status_code, duration)
+    return state
+
+
+def _mcp_record_exception(state: dict, e: Exception, span: Span, start: float) -> dict:
+    node = "Mongo MCP Tool Node (client)"
+    node_type = NodeType.MCP_CALL
+    duration = time.perf_counter() - start
+    state["error"] = f"MCP request failed: {str(e)}"
+
+    # Record MCP exception
+    metrics.record_mcp(
+        MCPResult(
+            MCPStatus.ERROR.value,
+            duration,
+            failure=f"{node_type.value}:{FailureReason.MCP_ERROR.value}",
+        )
+    )
+    span.set_attribute("mcp_status", "exception")
+    span.set_attribute("error_type", type(e).__name__)
+    span.set_status("error")
+    tracer.end_span(span)
+
+    # Only pay for the traceback when DEBUG output is wanted
+    logger.error(
+        "%s - exception - duration=%.4fs - %s",
+        node,
+        duration,
+        e,
+        exc_info=logger.isEnabledFor(logging.DEBUG),
+    )
+    return state
+
+
 # Mongo MCP Tool Node (calls MCP server only)
 def mongo_mcp_tool(
     state: dict,
     mcp_url: str,
     timeout: float = 30.0,
     parent_span_id: Optional[str] = None,
+    cache: Optional[dict] = None,
 ) -> dict:
-    node = "Mongo MCP Tool Node (client)"
-    node_type = NodeType.MCP_CALL
-
     # Start MCP span
     span = tracer.start_span("agent.mcp_call", parent_id=parent_span_id)
     span.set_attribute("query_type", state.get("query_type", "unknown"))
+    start = time.perf_counter()
 
-    start = time.time()
-    req = state["request"]
-    query_type = state.get("query_type", "single_student")
-    headers = {"Content-Type": "application/json"}
+    try:
+        call = _mcp_prepare(state, span, start, cache)
+        if call is None:
+            return state
+        path, payload = call
+        if path == "/query":
+            status, body, text = _query_single_flight(mcp_url, payload, timeout)
+            return _mcp_record_result(state, status, body, text, path, span, start, cache)
+        # Class rosters are large: parse them incrementally off the socket.
+        # They are still collected into a list: class_report indexes and
+        # makes several passes over the roster, and the connection must go
+        # back to the pool before this node returns
+        stream = ijson is not None and path == "/class_analysis"
+        r = http_session.post(
+            f"{mcp_url}{path}",
+            data=orjson.dumps(payload),
+            timeout=timeout,
+            stream=stream,
+        )
+        if stream and r.status_code == 200:
+            r.raw.decode_content = True
+            try:
+                students = list(ijson.items(r.raw, "students.item", use_float=True))
+            finally:
+                r.close()  # hand the connection back to the pool
+            body = {"students": students, "count": len(students)}
+            return _mcp_record_result(state, 200, body, "", path, span, start, cache)
+        return _mcp_record_response(state, r, path, span, start, cache)
+    except Exception as e:
+        return _mcp_record_exception(state, e, span, start)
 
-    # Simple in-memory cache for student queries
-    if not hasattr(mongo_mcp_tool, "cache"):
-        mongo_mcp_tool.cache = {}
-        mongo_mcp_tool.cache_ttl = 60.0
-        mongo_mcp_tool.cache_max = 200
 
-    def _get_cache(sid):
-        entry = mongo_mcp_tool.cache.get(sid)
-        if not entry:
-            return None
-        ts, val = entry
-        if time.time() - ts > mongo_mcp_tool.cache_ttl:
-            del mongo_mcp_tool.cache[sid]
-            return None
-        return val
+# Student lookups currently on the wire, keyed like _MCP_CACHE: concurrent
+# callers asking for the same record wait on the first caller's request
+_MCP_INFLIGHT: Dict[tuple, Future] = {}
+_MCP_INFLIGHT_LOCK = threading.Lock()
+
+
+def _query_single_flight(mcp_url: str, payload: dict, timeout: float):
+    """POST /query once per (student_id, fields) however many threads ask.
 
-    def _set_cache(sid, val):
-        if len(mongo_mcp_tool.cache) >= mongo_mcp_tool.cache_max:
-            # evict oldest
-            oldest = min(mongo_mcp_tool.cache.items(), key=lambda kv: kv[1][0])[0]
-            del mongo_mcp_tool.cache[oldest]
-        mongo_mcp_tool.cache[sid] = (time.time(), val)
+    Returns (status_code, parsed body or None, response text).
+    """
+    key = (payload["student_id"], tuple(payload["fields"]))
+    with _MCP_INFLIGHT_LOCK:
+        fut = _MCP_INFLIGHT.get(key)
+        leader = fut is None
+        if leader:
+            fut = _MCP_INFLIGHT[key] = Future()
+    if not leader:
+        return fut.result(timeout=timeout)
 
     try:
-        # For class_summary, use class_analysis endpoint
-        if query_type == "class_summary":
-            payload = {"limit": 500}
-            r = requests.post(
-                f"{mcp_url}/class_analysis",
-                json=payload,
-                headers=headers,
-                timeout=timeout,
-            )
-            duration = time.time() - start
-            if r.status_code == 200:
-                body = r.json()
-                state["mongo_result"] = body.get("students", [])
-
-                # Record MCP success metrics
-                metrics.increment_counter(
-                    metrics.mcp_requests_total, MCPStatus.SUCCESS.value
-                )
-                metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
-                span.set_attribute("mcp_status", "success")
-                span.set_attribute("student_count", body.get("count", 0))
-                tracer.end_span(span)
+        r = http_session.post(
+            f"{mcp_url}/query", data=orjson.dumps(payload), timeout=timeout
+        )
+        reply = (
+            r.status_code,
+            orjson.loads(r.content) if r.status_code == 200 else None,
+            r.text,
+        )
+        fut.set_result(reply)
+        return reply
+    except Exception as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _MCP_INFLIGHT_LOCK:
+            _MCP_INFLIGHT.pop(key, None)
 
-                logger.info(
-                    f"{node} - class_analysis - count={body.get('count', 0)} - duration={duration:.4f}s"
-                )
-                return state
-            else:
-                state["error"] = f"MCP error: {r.status_code} {r.text}"
 
-                # Record MCP error
-                status_key = (
-                    MCPStatus.ERROR.value
-                    if r.status_code >= 500
-                    else MCPStatus.VALIDATION_REJECT.value
-                )
-                metrics.increment_counter(metrics.mcp_requests_total, status_key)
-                metrics.increment_counter(
-                    metrics.mcp_rejected_requests_total, f"http_{r.status_code}"
-                )
-                metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
-                span.set_attribute("mcp_status", "error")
-                span.set_attribute("http_status", r.status_code)
-                span.set_status("error")
-                tracer.end_span(span)
-
-                logger.info(
-                    f"{node} - error - status={r.status_code} - duration={duration:.4f}s"
-                )
-                return state
-
-        # For single queries, use query endpoint
-        sid = req.get("student_id")
-        # Try cache
-        cached = _get_cache(sid)
-        if cached is not None:
-            state["mongo_result"] = cached
-
-            # Record cache hit
-            metrics.cache_hits += 1
-            span.set_attribute("cache_hit", True)
-            tracer.end_span(span)
+# Async client for the MCP server, created on first use inside the event loop
+_async_http = None
 
-            logger.info(
-                f"{node} - cache_hit - student_id={sid} - duration={time.time() - start:.4f}s"
-            )
-            return state
 
-        # Record cache miss
-        metrics.cache_misses += 1
-        span.set_attribute("cache_hit", False)
+def _get_async_http():
+    global _async_http
+    if _async_http is None:
+        import httpx
 
+        _async_http = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return _async_http
+
+
+class _AsyncChunkReader:
+    """Async file-like view of an httpx byte stream, for ijson.items_async."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes with read(0) and accepts short reads, but takes b"" as
+        # EOF, so skip empty chunks
+        if size == 0:
+            return b""
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+
+class StudentLoader:
+    """Coalesce student lookups made within a short window into one batch call.
+
+    Concurrent requests on the same event loop each `await loader.load(sid)`;
+    every id registered within `delay` seconds of the first is fetched with a
+    single /query_batch POST. Each lookup resolves to that student's batch
+    slot ({"student_id", "result", "error", "status_code"}).
+    """
+
+    def __init__(self, mcp_url: str, delay: float = 0.005, timeout: float = 30.0):
+        self.mcp_url = mcp_url
+        self.delay = delay
+        self.timeout = timeout
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle = None
+
+    def load(self, student_id: str) -> "asyncio.Future":
+        fut = self._pending.get(student_id)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self._pending[student_id] = loop.create_future()
+            if self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.delay, self._dispatch)
+        return fut
+
+    def _dispatch(self):
+        batch, self._pending, self._flush_handle = self._pending, {}, None
+        asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch: Dict[str, "asyncio.Future"]):
+        node = "Mongo MCP Tool Node (batch loader)"
+        start = time.perf_counter()
         payload = {
-            "student_id": sid,
-            "fields": [
-                "name",
-                "G1",
-                "G2",
-                "G3",
-                "studytime",
-                "absences",
-                "failures",
-                "goout",
-                "Dalc",
-                "Walc",
-            ],
+            "queries": [{"student_id": sid, "fields": STUDENT_FIELDS} for sid in batch]
         }
-        r = requests.post(
-            f"{mcp_url}/query", json=payload, headers=headers, timeout=timeout
-        )
-        duration = time.time() - start
-        if r.status_code == 200:
-            body = r.json()
-            state["mongo_result"] = body.get("result")
-            if state["mongo_result"] is not None:
-                _set_cache(sid, state["mongo_result"])
-            outcome = "empty" if body.get("result") is None else "success"
-
-            # Record MCP success
-            metrics.increment_counter(
-                metrics.mcp_requests_total, MCPStatus.SUCCESS.value
+        try:
+            r = await _get_async_http().post(
+                f"{self.mcp_url}/query_batch",
+                content=orjson.dumps(payload),
+                timeout=self.timeout,
             )
-            metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
-            span.set_attribute("mcp_status", outcome)
-            span.set_attribute("found", body.get("result") is not None)
-            tracer.end_span(span)
+            if r.status_code != 200:
+                raise RuntimeError(f"MCP error: {r.status_code} {r.text}")
+            slots = {item["student_id"]: item for item in orjson.loads(r.content)["results"]}
+        except Exception as e:
+            logger.warning(f"{node} - failed: {e} - duration={time.perf_counter() - start:.4f}s")
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        logger.info(
+            "%s - success - requested=%s - duration=%.4fs",
+            node,
+            len(batch),
+            time.perf_counter() - start,
+        )
+        for sid, fut in batch.items():
+            if not fut.done():
+                fut.set_result(slots.get(sid, {"student_id": sid, "result": None}))
+
+
+async def mongo_mcp_tool_async(
+    state: dict,
+    mcp_url: str,
+    timeout: float = 30.0,
+    parent_span_id: Optional[str] = None,
+    cache: Optional[dict] = None,
+    loader: Optional[StudentLoader] = None,
+) -> dict:
+    """Same as mongo_mcp_tool, but awaits the MCP call on a shared AsyncClient.
 
-            logger.info(f"{node} - {outcome} - duration={duration:.4f}s")
+    With a `loader`, single-student lookups are coalesced with other
+    concurrent requests into one /query_batch call.
+    """
+    span = tracer.start_span("agent.mcp_call", parent_id=parent_span_id)
+    span.set_attribute("query_type", state.get("query_type", "unknown"))
+    start = time.perf_counter()
+
+    try:
+        call = _mcp_prepare(state, span, start, cache)
+        if call is None:
             return state
-        else:
-            state["error"] = f"MCP error: {r.status_code} {r.text}"
+        path, payload = call
+        if loader is not None and path == "/query":
+            slot = await loader.load(payload["student_id"])
+            if slot.get("error"):
+                return _mcp_record_result(
+                    state, slot.get("status_code", 500), None, slot["error"],
+                    path, span, start, cache,
+                )
+            return _mcp_record_result(state, 200, slot, "", path, span, start, cache)
+        if ijson is not None and path == "/class_analysis":
+            # Parse the roster as chunks arrive rather than after the body;
+            # collected into a list for class_report, as in the sync path
+            async with _get_async_http().stream(
+                "POST",
+                f"{mcp_url}{path}",
+                content=orjson.dumps(payload),
+                timeout=timeout,
+            ) as r:
+                if r.status_code == 200:
+                    students = [
+                        s
+                        async for s in ijson.items_async(
+                            _AsyncChunkReader(r.aiter_bytes()),
+                            "students.item",
+                            use_float=True,
+                        )
+                    ]
+                    body = {"students": students, "count": len(students)}
+                    return _mcp_record_result(
+                        state, 200, body, "", path, span, start, cache
+                    )
+                await r.aread()
+            return _mcp_record_response(state, r, path, span, start, cache)
+        r = await _get_async_http().post(
+            f"{mcp_url}{path}", content=orjson.dumps(payload), timeout=timeout
+        )
+        return _mcp_record_response(state, r, path, span, start, cache)
+    except Exception as e:
+        return _mcp_record_exception(state, e, span, start)
 
-            # Record MCP error
-            status_key = (
-                MCPStatus.ERROR.value
-                if r.status_code >= 500
-                else MCPStatus.VALIDATION_REJECT.value
-            )
-            metrics.increment_counter(metrics.mcp_requests_total, status_key)
-            metrics.increment_counter(
-                metrics.mcp_rejected_requests_total, f"http_{r.status_code}"
-            )
-            metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
-            span.set_attribute("mcp_status", "error")
+
+def prefetch_students(
+    student_ids: List[str], mcp_url: str, cache: dict, timeout: float = 30.0
+) -> int:
+    """Fetch several students in one /query_batch call into a per-run cache.
+
+    Returns the number of records stored; later mongo_mcp_tool calls given
+    the same `cache` skip their own round trip for those students.
+    """
+    node = "Mongo MCP Tool Node (batch prefetch)"
+    sids = [sid for sid in dict.fromkeys(student_ids) if sid not in cache]
+    if not sids:
+        return 0
+
+    span = tracer.start_span("agent.mcp_call")
+    span.set_attribute("query_type", "batch_prefetch")
+    span.set_attribute("student_count", len(sids))
+    start = time.perf_counter()
+
+    payload = {"queries": [{"student_id": sid, "fields": STUDENT_FIELDS} for sid in sids]}
+    try:
+        r = http_session.post(
+            f"{mcp_url}/query_batch",
+            data=orjson.dumps(payload),
+            timeout=timeout,
+        )
+        duration = time.perf_counter() - start
+        if r.status_code != 200:
+            metrics.record_mcp(MCPResult(MCPStatus.ERROR.value, duration))
             span.set_attribute("http_status", r.status_code)
             span.set_status("error")
             tracer.end_span(span)
-
             logger.info(
-                f"{node} - error - status={r.status_code} - duration={duration:.4f}s"
+                "%s - error - status=%s - duration=%.4fs",
+                node,
+                r.status_code,
+                duration,
             )
-            return state
+            return 0
+
+        stored = 0
+        for item in orjson.loads(r.content).get("results", []):
+            if item.get("result") is not None:
+                cache[item["student_id"]] = item["result"]
+                stored += 1
+        metrics.record_mcp(MCPResult(MCPStatus.SUCCESS.value, duration))
+        span.set_attribute("found", stored)
+        tracer.end_span(span)
+        logger.info(
+            "%s - success - requested=%s found=%s - duration=%.4fs",
+            node,
+            len(sids),
+            stored,
+            duration,
+        )
+        return stored
     except Exception as e:
-        duration = time.time() - start
-        state["error"] = f"MCP request failed: {str(e)}"
-
-        # Record MCP exception
+        # Prefetch is best-effort: each request still falls back to its own call
+        duration = time.perf_counter() - start
         metrics.increment_counter(metrics.mcp_requests_total, MCPStatus.ERROR.value)
-        metrics.increment_counter(
-            metrics.agent_failures_total,
-            f"{node_type.value}:{FailureReason.MCP_ERROR.value}",
-        )
-        metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
-        span.set_attribute("mcp_status", "exception")
         span.set_attribute("error_type", type(e).__name__)
         span.set_status("error")
         tracer.end_span(span)
-
-        logger.exception(f"{node} - exception - duration={duration:.4f}s")
-        return state
+        logger.warning(f"{node} - failed: {e} - duration={duration:.4f}s")
+        return 0
 
 
 # Response Synthesis Node
@@ -559,20 +1115,17 @@ def response_node(state: dict, parent_span_id: Optional[str] = None) -> dict:
     span.set_attribute("has_analysis", state.get("analysis_result") is not None)
     span.set_attribute("has_mongo_result", state.get("mongo_result") is not None)
 
-    start = time.time()
+    start = time.perf_counter()
 
     # Check if analysis was done
     if state.get("analysis_result"):
         state["final_response"] = state["analysis_result"]
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record metrics
-        metrics.record_histogram(
-            metrics.agent_latency_seconds, node_type.value, duration
-        )
-        tracer.end_span(span)
+        record_node_result(span, node_type, duration, "analysis")
 
-        logger.info(f"{node} - analysis - duration={duration:.4f}s")
+        logger.info("%s - analysis - duration=%.4fs", node, duration)
         return state
 
     # Must not call DB here
@@ -585,27 +1138,24 @@ def response_node(state: dict, parent_span_id: Optional[str] = None) -> dict:
             )
         else:
             state["final_response"] = "No record found for that student."
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record metrics
-        metrics.record_histogram(
-            metrics.agent_latency_seconds, node_type.value, duration
-        )
-        tracer.end_span(span)
+        record_node_result(span, node_type, duration, "empty_or_no_query")
 
-        logger.info(f"{node} - empty_or_no_query - duration={duration:.4f}s")
+        logger.info("%s - empty_or_no_query - duration=%.4fs", node, duration)
         return state
 
     # Compose human-readable structured response
-    parts = [f"{k}: {v}" for k, v in mongo.items()]
-    state["final_response"] = "Student data — " + "; ".join(parts)
-    duration = time.time() - start
+    state["final_response"] = "Student data — " + "; ".join(
+        f"{k}: {v}" for k, v in mongo.items()
+    )
+    duration = time.perf_counter() - start
 
     # Record metrics
-    metrics.record_histogram(metrics.agent_latency_seconds, node_type.value, duration)
-    tracer.end_span(span)
+    record_node_result(span, node_type, duration)
 
-    logger.info(f"{node} - success - duration={duration:.4f}s")
+    logger.info("%s - success - duration=%.4fs", node, duration)
     return state
 
 
@@ -622,17 +1172,9 @@ def performance_analysis_node(
     student_id = state.get("request", {}).get("student_id")
     span.set_attribute("analysis_type", query_type)
 
-    start = time.time()
+    start = time.perf_counter()
 
     try:
-        from src.performance_analyzer import (
-            summarize_student,
-            detect_trend,
-            derived_metrics,
-            class_analysis,
-            class_summary_statistics,
-        )
-
         if query_type == "single_student":
             # Fetch student and summarize
             if not state.get("mongo_result"):
@@ -641,16 +1183,12 @@ def performance_analysis_node(
                 state["analysis_result"] = summarize_student(
                     state["mongo_result"], student_id
                 )
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record metrics
-            metrics.record_simple_histogram(metrics.analysis_latency_seconds, duration)
-            metrics.record_histogram(
-                metrics.agent_latency_seconds, node_type.value, duration
-            )
-            tracer.end_span(span)
+            record_node_result(span, node_type, duration)
 
-            logger.info(f"{node} - single_student - duration={duration:.4f}s")
+            logger.info("%s - single_student - duration=%.4fs", node, duration)
             return state
 
         if query_type == "trend":
@@ -661,16 +1199,12 @@ def performance_analysis_node(
                 state["analysis_result"] = detect_trend(
                     state["mongo_result"], student_id
                 )
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record metrics
-            metrics.record_simple_histogram(metrics.analysis_latency_seconds, duration)
-            metrics.record_histogram(
-                metrics.agent_latency_seconds, node_type.value, duration
-            )
-            tracer.end_span(span)
+            record_node_result(span, node_type, duration)
 
-            logger.info(f"{node} - trend - duration={duration:.4f}s")
+            logger.info("%s - trend - duration=%.4fs", node, duration)
             return state
 
         if query_type == "derived_metrics":
@@ -696,24 +1230,21 @@ def performance_analysis_node(
                     state["analysis_result"] = (
                         f"Student {derived_result['student_id']} {cue} has no alerts."
                     )
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record metrics
-            from src.observability import metrics as obs_metrics
-
-            obs_metrics.record_simple_histogram(obs_metrics.analysis_latency_seconds, duration)
-            obs_metrics.record_histogram(
-                obs_metrics.agent_latency_seconds, node_type.value, duration
+            record_node_result(
+                span,
+                node_type,
+                duration,
+                extra={
+                    "has_alerts": derived_result.get("has_alerts", False)
+                    if state.get("mongo_result")
+                    else False
+                },
             )
-            span.set_attribute(
-                "has_alerts",
-                derived_result.get("has_alerts", False)
-                if state.get("mongo_result")
-                else False,
-            )
-            tracer.end_span(span)
 
-            logger.info(f"{node} - derived_metrics - duration={duration:.4f}s")
+            logger.info("%s - derived_metrics - duration=%.4fs", node, duration)
             return state
 
         if query_type == "class_summary":
@@ -721,57 +1252,49 @@ def performance_analysis_node(
             # For demo, assume mongo_result is a list
             if isinstance(state.get("mongo_result"), list):
                 students = state["mongo_result"]
-                analysis_text = (
-                    class_analysis(students)
-                    + "\n\n"
-                    + class_summary_statistics(students)
-                )
-                state["analysis_result"] = analysis_text
+                state["analysis_result"] = class_report(students)
             else:
                 state["analysis_result"] = "Class data not available."
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record metrics
-            from src.observability import metrics as obs_metrics
-
-            obs_metrics.record_simple_histogram(obs_metrics.analysis_latency_seconds, duration)
-            obs_metrics.record_histogram(
-                obs_metrics.agent_latency_seconds, node_type.value, duration
+            record_node_result(
+                span,
+                node_type,
+                duration,
+                extra={"student_count": len(state.get("mongo_result", []))},
             )
-            span.set_attribute("student_count", len(state.get("mongo_result", [])))
-            tracer.end_span(span)
 
-            logger.info(f"{node} - class_summary - duration={duration:.4f}s")
+            logger.info("%s - class_summary - duration=%.4fs", node, duration)
             return state
 
         state["analysis_result"] = "Unknown analysis type."
 
         # Record metrics for unknown type
-        from src.observability import metrics as obs_metrics
-
-        obs_metrics.record_simple_histogram(
-            obs_metrics.analysis_latency_seconds, time.time() - start
-        )
-        tracer.end_span(span)
+        record_node_result(span, node_type, time.perf_counter() - start, "unknown")
 
         return state
 
     except Exception as e:
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record failure metrics
-        from src.observability import metrics as obs_metrics
-
-        obs_metrics.increment_counter(
-            obs_metrics.agent_failures_total,
-            f"{node_type.value}:{FailureReason.ANALYSIS.value}",
+        record_node_result(
+            span,
+            node_type,
+            duration,
+            "error",
+            failure=FailureReason.ANALYSIS,
+            extra={"error_type": type(e).__name__},
         )
-        obs_metrics.record_simple_histogram(obs_metrics.analysis_latency_seconds, duration)
-        span.set_attribute("error_type", type(e).__name__)
-        span.set_status("error")
-        tracer.end_span(span)
 
-        logger.exception(f"{node} - error - {e} - duration={duration:.4f}s")
+        logger.error(
+            "%s - error - %s - duration=%.4fs",
+            node,
+            e,
+            duration,
+            exc_info=logger.isEnabledFor(logging.DEBUG),
+        )
         state["error"] = f"Analysis failed: {str(e)}"
         return state
 
@@ -779,28 +1302,37 @@ def performance_analysis_node(
 # Error / Fallback Node
 def error_node(state: dict) -> dict:
     node = "Error Node"
-    start = time.time()
+    start = time.perf_counter()
     state["attempt_count"] = state.get("attempt_count", 0) + 1
     if state["attempt_count"] > 2:
         state["error"] = state.get("error") or "Maximum attempts exceeded"
         state["final_response"] = (
             "An error occurred and we couldn't complete your request."
         )
-        duration = time.time() - start
-        logger.info(f"{node} - hard_stop - duration={duration:.4f}s")
+        duration = time.perf_counter() - start
+        logger.info("%s - hard_stop - duration=%.4fs", node, duration)
         return state
 
     # Provide a clean user message
     err = state.get("error") or "Unknown error"
     state["final_response"] = f"Error: {err}"
-    duration = time.time() - start
-    logger.info(f"{node} - responded - duration={duration:.4f}s")
+    duration = time.perf_counter() - start
+    logger.info("%s - responded - duration=%.4fs", node, duration)
     return state
 
 
 # Top-level runner for one request
-def handle_request(raw_input: str, mcp_url: str) -> dict:
-    state = make_initial_state(raw_input)
+def handle_request(
+    raw_input: str,
+    mcp_url: str,
+    cache: Optional[dict] = None,
+    student_id: Optional[str] = None,
+) -> dict:
+    # `cache` lets a caller share fetched student records across a batch of
+    # requests (keyed by student_id); it is never expired or evicted here.
+    # `student_id` is an id the caller already extracted from `raw_input`;
+    # the Intent Node then only has to classify the query.
+    state = make_initial_state(raw_input, student_id)
 
     # Intent
     state = intent_node(state)
@@ -818,7 +1350,7 @@ def handle_request(raw_input: str, mcp_url: str) -> dict:
         return state
 
     # route == "mongo" or "analysis"
-    state = mongo_mcp_tool(state, mcp_url)
+    state = mongo_mcp_tool(state, mcp_url, cache=cache)
     if state.get("error"):
         state = error_node(state)
         return state
@@ -832,3 +1364,56 @@ def handle_request(raw_input: str, mcp_url: str) -> dict:
 
     state = response_node(state)
     return state
+
+
+async def handle_request_async(
+    raw_input: str,
+    mcp_url: str,
+    cache: Optional[dict] = None,
+    student_id: Optional[str] = None,
+    loader: Optional[StudentLoader] = None,
+) -> dict:
+    """Async counterpart of handle_request for callers running an event loop.
+
+    Many requests can be awaited together (e.g. with asyncio.gather) and their
+    MCP calls and Groq calls overlap on shared async clients; the CPU-bound
+    analysis node runs in a worker thread. When the caller already knows the student id,
+    the record is fetched while the intent is still being classified. Pass
+    one shared StudentLoader to batch the lookups of concurrent requests.
+    """
+    state = make_initial_state(raw_input, student_id)
+    cache = {} if cache is None else cache
+
+    if student_id and student_id not in cache:
+        # An untyped lookup fetches the full record, usable by any query type
+        prefetch = make_initial_state(raw_input, student_id)
+        prefetch["query_type"] = "prefetch"
+        state, _ = await asyncio.gather(
+            intent_node_async(state),
+            mongo_mcp_tool_async(prefetch, mcp_url, cache=cache, loader=loader),
+        )
+    else:
+        state = await intent_node_async(state)
+
+    # Validation
+    state = validation_node(state)
+    route = route_intent(state)
+
+    if route == "error":
+        return error_node(state)
+
+    if route == "respond":
+        return response_node(state)
+
+    # route == "mongo" or "analysis"
+    state = await mongo_mcp_tool_async(state, mcp_url, cache=cache, loader=loader)
+    if state.get("error"):
+        return error_node(state)
+
+    # If analysis is needed, run the analysis node
+    if route == "analysis":
+        state = await asyncio.to_thread(performance_analysis_node, state)
+        if state.get("error"):
+            return error_node(state)
+
+    return response_node(state)
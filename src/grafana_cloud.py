@@ -6,9 +6,13 @@ Pushes metrics to Grafana Cloud Prometheus endpoint
 import os
 import time
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from prometheus_client import CollectorRegistry, Counter, Histogram, Gauge, Info
-from prometheus_client.exposition import basic_auth_handler, push_to_gateway
+from prometheus_client.exposition import push_to_gateway
 
 logger = logging.getLogger("grafana_cloud")
 
@@ -22,10 +26,41 @@ class GrafanaCloudExporter:
         self.user = os.getenv("GRAFANA_CLOUD_PROMETHEUS_USER", "")
         self.api_key = os.getenv("GRAFANA_CLOUD_API_KEY", "")
         self.job_name = os.getenv("GRAFANA_CLOUD_JOB_NAME", "mcp-agent-dashboard")
+        self.push_interval = int(os.getenv("GRAFANA_CLOUD_PUSH_INTERVAL_SECS", "15"))
+        self._stop = threading.Event()
+        self._push_thread = None
+
+        # One keep-alive session for every push instead of a new TCP+TLS
+        # handshake each interval. Pushes are PUTs of the full registry, so
+        # retrying them is safe.
+        self._push_session = requests.Session()
+        self._push_session.auth = (self.user, self.api_key)
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=2,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(["PUT", "POST", "DELETE"]),
+            ),
+        )
+        self._push_session.mount("https://", adapter)
+        self._push_session.mount("http://", adapter)
 
         self.registry = CollectorRegistry()
         self._init_metrics()
 
+        # Bound .labels() children, keyed by label values. labels() hashes the
+        # label tuple and takes the metric lock on every call; the label sets
+        # here are small and stable, so resolve each child once.
+        self._http_req_children: Dict[Tuple[str, str, str], Any] = {}
+        self._http_dur_children: Dict[Tuple[str, str], Any] = {}
+        self._agent_query_children: Dict[Tuple[str, str], Any] = {}
+        self._llm_token_children: Dict[str, Any] = {}
+        self._llm_cost_children: Dict[str, Any] = {}
+        self._mongo_dur_children: Dict[str, Any] = {}
+
         if self.enabled:
             if not all([self.gateway_url, self.user, self.api_key]):
                 logger.warning(
@@ -34,6 +69,26 @@ class GrafanaCloudExporter:
                 self.enabled = False
             else:
                 logger.info(f"Grafana Cloud exporter initialized: {self.gateway_url}")
+                # Pushes are a blocking HTTP POST; keep them off request
+                # threads and the event loop.
+                self._push_thread = threading.Thread(
+                    target=self._push_loop, name="grafana-push", daemon=True
+                )
+                self._push_thread.start()
+
+    def _push_loop(self):
+        """Push metrics every push_interval seconds until close()."""
+        while not self._stop.wait(self.push_interval):
+            self.push_metrics()
+
+    def close(self):
+        """Stop the background pusher after flushing a final push."""
+        if self._push_thread is None:
+            return
+        self._stop.set()
+        self._push_thread.join(timeout=self.push_interval)
+        self._push_thread = None
+        self.push_metrics()
 
     def _init_metrics(self):
         """Initialize Prometheus metrics."""
@@ -56,8 +111,8 @@ class GrafanaCloudExporter:
         # Business metrics
         self.agent_queries_total = Counter(
             "agent_queries_total",
-            "Total agent queries by type",
-            ["query_type"],
+            "Total agent queries by type and intent path",
+            ["query_type", "intent_path"],
             registry=self.registry,
         )
 
@@ -122,23 +177,34 @@ class GrafanaCloudExporter:
             return
 
         try:
-
-            def handler(url, method, timeout, headers, data):
-                """Basic auth handler for Grafana Cloud."""
-                return basic_auth_handler(
-                    url, method, timeout, headers, data, self.user, self.api_key
-                )
-
             push_to_gateway(
                 self.gateway_url,
                 job=self.job_name,
                 registry=self.registry,
-                handler=handler,
+                handler=self._push_handler,
             )
             logger.debug("Metrics pushed to Grafana Cloud successfully")
         except Exception as e:
             logger.error(f"Failed to push metrics to Grafana Cloud: {e}")
 
+    def _push_handler(
+        self,
+        url: str,
+        method: str,
+        timeout: Optional[float],
+        headers: List[Tuple[str, str]],
+        data: bytes,
+    ):
+        """push_to_gateway handler that sends through the pooled session."""
+
+        def handle():
+            resp = self._push_session.request(
+                method, url, data=data, headers=dict(headers), timeout=timeout
+            )
+            resp.raise_for_status()
+
+        return handle
+
     def record_http_request(
         self, method: str, endpoint: str, status_code: int, duration: float
     ):
@@ -147,25 +213,63 @@ class GrafanaCloudExporter:
             return
 
         status = str(status_code)
-        self.http_requests_total.labels(
-            method=method, endpoint=endpoint, status=status
-        ).inc()
-        self.http_request_duration_seconds.labels(
-            method=method, endpoint=endpoint
-        ).observe(duration)
-
-    def record_agent_query(self, query_type: str):
-        """Record agent query metric."""
+        key = (method, endpoint, status)
+        child = self._http_req_children.get(key)
+        if child is None:
+            child = self._http_req_children.setdefault(
+                key,
+                self.http_requests_total.labels(
+                    method=method, endpoint=endpoint, status=status
+                ),
+            )
+        child.inc()
+
+        dur_key = (method, endpoint)
+        dur_child = self._http_dur_children.get(dur_key)
+        if dur_child is None:
+            dur_child = self._http_dur_children.setdefault(
+                dur_key,
+                self.http_request_duration_seconds.labels(
+                    method=method, endpoint=endpoint
+                ),
+            )
+        dur_child.observe(duration)
+
+    def record_agent_query(self, query_type: str, intent_path: str = "llm"):
+        """Record agent query metric.
+
+        intent_path says how the query was classified: "fast" (keyword
+        match, LLM skipped), "cache", "llm" or "fallback" (LLM unavailable).
+        """
         if not self.enabled:
             return
-        self.agent_queries_total.labels(query_type=query_type).inc()
+        key = (query_type, intent_path)
+        child = self._agent_query_children.get(key)
+        if child is None:
+            child = self._agent_query_children.setdefault(
+                key,
+                self.agent_queries_total.labels(
+                    query_type=query_type, intent_path=intent_path
+                ),
+            )
+        child.inc()
 
     def record_llm_usage(self, model: str, tokens: int, cost: float):
         """Record LLM usage metrics."""
         if not self.enabled:
             return
-        self.llm_tokens_used_total.labels(model=model).inc(tokens)
-        self.llm_cost_usd_total.labels(model=model).inc(cost)
+        tokens_child = self._llm_token_children.get(model)
+        if tokens_child is None:
+            tokens_child = self._llm_token_children.setdefault(
+                model, self.llm_tokens_used_total.labels(model=model)
+            )
+        cost_child = self._llm_cost_children.get(model)
+        if cost_child is None:
+            cost_child = self._llm_cost_children.setdefault(
+                model, self.llm_cost_usd_total.labels(model=model)
+            )
+        tokens_child.inc(tokens)
+        cost_child.inc(cost)
 
     def record_cache(self, hit: bool):
         """Record cache hit/miss."""
@@ -180,9 +284,13 @@ class GrafanaCloudExporter:
         """Record MongoDB query metric."""
         if not self.enabled:
             return
-        self.mongodb_query_duration_seconds.labels(operation=operation).observe(
-            duration
-        )
+        child = self._mongo_dur_children.get(operation)
+        if child is None:
+            child = self._mongo_dur_children.setdefault(
+                operation,
+                self.mongodb_query_duration_seconds.labels(operation=operation),
+            )
+        child.observe(duration)
 
     def set_student_metrics(self, total: int, at_risk: int):
         """Update student metrics."""
@@ -5,12 +5,16 @@ FastAPI backend for student performance analysis via MCP protocol
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import os
 import time
+import mimetypes
 import logging
 import asyncio
 from dotenv import load_dotenv
@@ -41,45 +45,45 @@ app = FastAPI(
     title="MCP Student Analytics API",
     description="API for querying and analyzing student performance data via MCP",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 
-# Background task to push metrics to Grafana Cloud
-async def push_metrics_task():
-    """Periodically push metrics to Grafana Cloud."""
-    while True:
-        await asyncio.sleep(15)  # Push every 15 seconds
-        if GRAFANA_ENABLED and grafana_exporter is not None:
-            try:
-                grafana_exporter.push_metrics()
-                logger.debug("Metrics pushed to Grafana Cloud")
-            except Exception as e:
-                logger.error(f"Failed to push metrics: {e}")
-
-
 # Startup event
 @app.on_event("startup")
 async def startup_event():
-    import asyncio
-
     logger.info("🚀 FastAPI application starting up...")
     logger.info(f"📊 MongoDB connected: {USE_REAL_DB}")
     logger.info(
         f"🌐 Environment: {'Railway' if os.getenv('RAILWAY_ENVIRONMENT') else 'Local'}"
     )
+    global _system_metrics_task
+    _system_metrics_task = asyncio.create_task(refresh_system_metrics_task())
     if GRAFANA_ENABLED:
+        # The exporter pushes from its own daemon thread
         logger.info("📈 Grafana Cloud metrics collection active")
-        # Start background metrics pushing task
-        asyncio.create_task(push_metrics_task())
     logger.info("✅ Application ready!")
 
 
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _system_metrics_task is not None:
+        _system_metrics_task.cancel()
+        try:
+            await _system_metrics_task
+        except asyncio.CancelledError:
+            pass
+    if GRAFANA_ENABLED and grafana_exporter is not None:
+        await asyncio.to_thread(grafana_exporter.close)
+
+
 # Middleware to track request metrics
 @app.middleware("http")
 async def metrics_middleware(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = await call_next(request)
-    duration = time.time() - start_time
+    duration = time.perf_counter() - start_time
 
     # Record metrics for Grafana Cloud
     if (
@@ -104,10 +108,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/HTML responses; precompressed static assets already carry a
+# Content-Encoding and pass through untouched
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 # Include Prometheus metrics exporter
 from src.metrics_exporter import router as metrics_router
+from src.observability import get_metrics_summary, get_metrics_totals
+from src.response_cache import cached, router as cache_router
+from src.mcp_core import projection_for
 
 app.include_router(metrics_router)
+app.include_router(cache_router)
 
 # MongoDB setup
 MONGO_URI = os.getenv("MONGO_URI")
@@ -119,11 +131,14 @@ USE_REAL_DB = False
 
 if MONGO_URI and MONGO_DB and MONGO_COLLECTION:
     try:
-        from pymongo import MongoClient
+        # Async driver: route handlers await Mongo instead of blocking the loop
+        from motor.motor_asyncio import AsyncIOMotorClient
         from bson import ObjectId
         import certifi
 
-        client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+        client = AsyncIOMotorClient(
+            MONGO_URI, tlsCAFile=certifi.where(), maxPoolSize=50, minPoolSize=5
+        )
         mongo_collection = client[MONGO_DB][MONGO_COLLECTION]
         USE_REAL_DB = True
         logger.info("Connected to MongoDB")
@@ -157,6 +172,9 @@ class ClassAnalysisResponse(BaseModel):
     count: int
 
 
+# Response shapes of the /api/analyze routes. Those routes return their
+# server-built dicts through ORJSONResponse, so these only document the
+# OpenAPI schema and are not re-validated per response.
 class StudentSummary(BaseModel):
     student_id: str
     grades: List[int]
@@ -181,13 +199,22 @@ class RiskAssessment(BaseModel):
     has_alerts: bool
 
 
+class FullAnalysis(BaseModel):
+    student_id: str
+    summary: Optional[StudentSummary] = None
+    trend: Optional[TrendResponse] = None
+    risk: RiskAssessment
+
+
 # Helper functions
+_TRENDS = ("declining", "stable", "improving")
+_RISK_LEVELS = ("high", "medium", "low")
+
+
 def calculate_trend(G1: int, G2: int, G3: int) -> str:
-    if G3 > G2 and G2 > G1:
-        return "improving"
-    elif G3 < G2 and G2 < G1:
-        return "declining"
-    return "stable"
+    # Index by comparison arithmetic instead of branching: strictly rising
+    # -> 2, strictly falling -> 0, anything else -> 1
+    return _TRENDS[(G1 < G2 < G3) - (G1 > G2 > G3) + 1]
 
 
 def create_sparkline(grades: List[int]) -> str:
@@ -204,11 +231,8 @@ def create_sparkline(grades: List[int]) -> str:
 
 
 def get_risk_level(G3: int) -> str:
-    if G3 < 10:
-        return "high"
-    elif G3 < 12:
-        return "medium"
-    return "low"
+    # < 10 high, 10-11 medium, >= 12 low
+    return _RISK_LEVELS[(G3 >= 10) + (G3 >= 12)]
 
 
 # API Routes
@@ -217,42 +241,48 @@ async def health_check():
     return {"status": "healthy", "database": "connected" if USE_REAL_DB else "mock"}
 
 
+@cached(expire=30, key=lambda student_id, fields: [student_id, sorted(fields)])
+async def _fetch_student(
+    student_id: str, fields: List[str]
+) -> Optional[Dict[str, Any]]:
+    """Projected student document, or None if there is no such student."""
+    if USE_REAL_DB and mongo_collection is not None:
+        # ObjectId is bound at module scope alongside the Mongo client;
+        # the projection dict is memoized per field set
+        proj = projection_for(fields)
+        # 12-byte constructor skips bson's string parsing; a malformed
+        # id still fails (ValueError/InvalidId) into the callers' 500 path
+        return await mongo_collection.find_one(
+            {"_id": ObjectId(bytes.fromhex(student_id))}, proj
+        )
+
+    # Mock data
+    mock_db = {
+        "689cef602490264c7f2dd235": {
+            "name": "Sample Student",
+            "G1": 6,
+            "G2": 10,
+            "G3": 10,
+            "studytime": 2,
+            "absences": 0,
+            "failures": 0,
+            "goout": 3,
+            "Dalc": 1,
+            "Walc": 1,
+        }
+    }
+    doc = mock_db.get(student_id)
+    if doc:
+        return {k: v for k, v in doc.items() if k in fields}
+    return None
+
+
 @app.post("/api/query", response_model=QueryResponse)
 async def query_student(request: QueryRequest):
     """Query a single student by ID"""
     try:
-        if USE_REAL_DB and mongo_collection is not None:
-            from bson import ObjectId
-
-            proj = {f: 1 for f in request.fields}
-            proj["_id"] = 0
-            doc = mongo_collection.find_one({"_id": ObjectId(request.student_id)}, proj)
-
-            if doc is None:
-                return QueryResponse(student_id=request.student_id, result=None)
-
-            return QueryResponse(student_id=request.student_id, result=doc)
-        else:
-            # Mock data
-            mock_db = {
-                "689cef602490264c7f2dd235": {
-                    "name": "Sample Student",
-                    "G1": 6,
-                    "G2": 10,
-                    "G3": 10,
-                    "studytime": 2,
-                    "absences": 0,
-                    "failures": 0,
-                    "goout": 3,
-                    "Dalc": 1,
-                    "Walc": 1,
-                }
-            }
-            doc = mock_db.get(request.student_id)
-            if doc:
-                projected = {k: v for k, v in doc.items() if k in request.fields}
-                return QueryResponse(student_id=request.student_id, result=projected)
-            return QueryResponse(student_id=request.student_id, result=None)
+        doc = await _fetch_student(request.student_id, request.fields)
+        return QueryResponse(student_id=request.student_id, result=doc)
 
     except Exception as e:
         logger.error(f"Query error: {e}")
@@ -260,6 +290,7 @@ async def query_student(request: QueryRequest):
 
 
 @app.post("/api/class_analysis", response_model=ClassAnalysisResponse)
+@cached(expire=30, model=ClassAnalysisResponse)
 async def class_analysis(request: ClassAnalysisRequest):
     """Get class-level analysis"""
     try:
@@ -274,10 +305,18 @@ async def class_analysis(request: ClassAnalysisRequest):
                 "absences": 1,
                 "failures": 1,
             }
-            students = list(mongo_collection.find({}, proj).limit(request.limit))
+            # One batch for the whole page: no getMore round trips past the
+            # server's 101-document first batch
+            cursor = (
+                mongo_collection.find({}, proj)
+                .limit(request.limit)
+                .batch_size(request.limit)
+            )
+            students = await cursor.to_list(length=request.limit)
 
+            # .binary.hex() is str(ObjectId) without the __str__ dispatch
             for s in students:
-                s["_id"] = str(s["_id"])
+                s["_id"] = s["_id"].binary.hex()
 
             return ClassAnalysisResponse(students=students, count=len(students))
         else:
@@ -314,42 +353,129 @@ async def class_analysis(request: ClassAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/analyze/summary")
-async def analyze_summary(request: QueryRequest):
-    """Get student summary with analysis"""
-    try:
-        # Get student data
-        query_response = await query_student(request)
+# Every field the summary, trend and risk views read between them
+ANALYSIS_FIELDS = [
+    "name",
+    "G1",
+    "G2",
+    "G3",
+    "studytime",
+    "absences",
+    "failures",
+    "goout",
+    "Dalc",
+    "Walc",
+]
+
+
+def build_summary(student_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    get = doc.get
+    valid_grades = [
+        g for g in (get("G1", 0), get("G2", 0), get("G3", 0)) if g is not None
+    ]
+
+    if not valid_grades:
+        raise HTTPException(status_code=400, detail="No grade data available")
+
+    # At most three grades: unroll the sum and read the ends once
+    n = len(valid_grades)
+    first = valid_grades[0]
+    final_grade = valid_grades[-1]
+    total = (
+        first
+        + (valid_grades[1] if n > 1 else 0)
+        + (valid_grades[2] if n > 2 else 0)
+    )
+    avg = total / n
+    growth = final_grade - first if n >= 2 else 0
+    status = "at-risk" if final_grade < 10 else "okay"
 
-        if not query_response.result:
-            raise HTTPException(status_code=404, detail="Student not found")
+    studytime = get("studytime", 0)
+    study_quality = (
+        "good" if studytime >= 2 and final_grade >= 12 else "needs improvement"
+    )
 
-        doc = query_response.result
-        grades = [doc.get("G1", 0), doc.get("G2", 0), doc.get("G3", 0)]
-        valid_grades = [g for g in grades if g is not None]
+    return {
+        "student_id": student_id,
+        "grades": valid_grades,
+        "average": round(avg, 1),
+        "latest_grade": final_grade,
+        "status": status,
+        "growth": growth,
+        "study_efficiency": study_quality,
+    }
 
-        if not valid_grades:
-            raise HTTPException(status_code=400, detail="No grade data available")
 
-        avg = sum(valid_grades) / len(valid_grades)
-        growth = valid_grades[-1] - valid_grades[0] if len(valid_grades) >= 2 else 0
-        status = "at-risk" if valid_grades[-1] < 10 else "okay"
+def build_trend(student_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    grades = [doc.get("G1"), doc.get("G2"), doc.get("G3")]
+    valid_grades = [g for g in grades if g is not None]
 
-        studytime = doc.get("studytime", 0)
-        final_grade = valid_grades[-1]
-        study_quality = (
-            "good" if studytime >= 2 and final_grade >= 12 else "needs improvement"
-        )
+    if len(valid_grades) < 2:
+        raise HTTPException(status_code=400, detail="Insufficient grade data")
 
-        return StudentSummary(
-            student_id=request.student_id,
-            grades=valid_grades,
-            average=round(avg, 1),
-            latest_grade=final_grade,
-            status=status,
-            growth=growth,
-            study_efficiency=study_quality,
-        )
+    trend = calculate_trend(
+        valid_grades[0],
+        valid_grades[1] if len(valid_grades) > 1 else valid_grades[0],
+        valid_grades[-1],
+    )
+    sparkline = create_sparkline(valid_grades)
+
+    return {
+        "student_id": student_id,
+        "trend": trend,
+        "grades": valid_grades,
+        "sparkline": sparkline,
+    }
+
+
+def build_risk(student_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    G3 = doc.get("G3", 0)
+    alerts = []
+
+    # Check risk factors
+    failures = doc.get("failures", 0)
+    studytime = doc.get("studytime", 0)
+    if failures > 0 and studytime < 2:
+        alerts.append(f"{failures} failures with low study time ({studytime}h)")
+
+    absences = doc.get("absences", 0)
+    if absences > 10:
+        alerts.append(f"High absence rate: {absences}")
+
+    goout = doc.get("goout", 0)
+    dalc = doc.get("Dalc", 0)
+    walc = doc.get("Walc", 0)
+    if goout > 3 or dalc > 3 or walc > 3:
+        alerts.append(f"High social activity: goout={goout}, alcohol consumption")
+
+    if G3 < 10:
+        alerts.append(f"At risk: final grade {G3}")
+
+    risk = get_risk_level(G3)
+
+    return {
+        "student_id": student_id,
+        "risk_level": risk,
+        "alerts": alerts,
+        "has_alerts": len(alerts) > 0,
+    }
+
+
+async def fetch_student_doc(student_id: str, fields: List[str]) -> Dict[str, Any]:
+    # Straight to the cached lookup: no QueryRequest/QueryResponse round trip
+    doc = await _fetch_student(student_id, fields)
+
+    if not doc:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return doc
+
+
+@app.post("/api/analyze/summary", responses={200: {"model": StudentSummary}})
+async def analyze_summary(request: QueryRequest):
+    """Get student summary with analysis"""
+    try:
+        doc = await fetch_student_doc(request.student_id, request.fields)
+        return ORJSONResponse(build_summary(request.student_id, doc))
 
     except HTTPException:
         raise
@@ -358,35 +484,12 @@ async def analyze_summary(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/analyze/trend")
+@app.post("/api/analyze/trend", responses={200: {"model": TrendResponse}})
 async def analyze_trend(request: QueryRequest):
     """Get student grade trend"""
     try:
-        query_response = await query_student(request)
-
-        if not query_response.result:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        doc = query_response.result
-        grades = [doc.get("G1"), doc.get("G2"), doc.get("G3")]
-        valid_grades = [g for g in grades if g is not None]
-
-        if len(valid_grades) < 2:
-            raise HTTPException(status_code=400, detail="Insufficient grade data")
-
-        trend = calculate_trend(
-            valid_grades[0],
-            valid_grades[1] if len(valid_grades) > 1 else valid_grades[0],
-            valid_grades[-1],
-        )
-        sparkline = create_sparkline(valid_grades)
-
-        return TrendResponse(
-            student_id=request.student_id,
-            trend=trend,
-            grades=valid_grades,
-            sparkline=sparkline,
-        )
+        doc = await fetch_student_doc(request.student_id, request.fields)
+        return ORJSONResponse(build_trend(request.student_id, doc))
 
     except HTTPException:
         raise
@@ -395,82 +498,69 @@ async def analyze_trend(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/analyze/risk")
+@app.post("/api/analyze/risk", responses={200: {"model": RiskAssessment}})
 async def analyze_risk(request: QueryRequest):
     """Get student risk assessment"""
     try:
         # Get full student data
-        full_request = QueryRequest(
-            student_id=request.student_id,
-            fields=[
-                "name",
-                "G1",
-                "G2",
-                "G3",
-                "studytime",
-                "absences",
-                "failures",
-                "goout",
-                "Dalc",
-                "Walc",
-            ],
-        )
-        query_response = await query_student(full_request)
-
-        if not query_response.result:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        doc = query_response.result
-        G3 = doc.get("G3", 0)
-        alerts = []
+        doc = await fetch_student_doc(request.student_id, ANALYSIS_FIELDS)
+        return ORJSONResponse(build_risk(request.student_id, doc))
 
-        # Check risk factors
-        failures = doc.get("failures", 0)
-        studytime = doc.get("studytime", 0)
-        if failures > 0 and studytime < 2:
-            alerts.append(f"{failures} failures with low study time ({studytime}h)")
-
-        absences = doc.get("absences", 0)
-        if absences > 10:
-            alerts.append(f"High absence rate: {absences}")
-
-        goout = doc.get("goout", 0)
-        dalc = doc.get("Dalc", 0)
-        walc = doc.get("Walc", 0)
-        if goout > 3 or dalc > 3 or walc > 3:
-            alerts.append(f"High social activity: goout={goout}, alcohol consumption")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Risk analysis error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if G3 < 10:
-            alerts.append(f"At risk: final grade {G3}")
 
-        risk = get_risk_level(G3)
+@app.post("/api/analyze/full", responses={200: {"model": FullAnalysis}})
+async def analyze_full(request: QueryRequest):
+    """Summary, trend and risk for one student from a single DB lookup"""
+    try:
+        doc = await fetch_student_doc(request.student_id, ANALYSIS_FIELDS)
 
-        return RiskAssessment(
-            student_id=request.student_id,
-            risk_level=risk,
-            alerts=alerts,
-            has_alerts=len(alerts) > 0,
+        # Views without enough grade data are left empty instead of failing
+        # the whole response
+        views = {}
+        for name, build in (("summary", build_summary), ("trend", build_trend)):
+            try:
+                views[name] = build(request.student_id, doc)
+            except HTTPException:
+                views[name] = None
+
+        return ORJSONResponse(
+            {
+                "student_id": request.student_id,
+                "risk": build_risk(request.student_id, doc),
+                **views,
+            }
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Risk analysis error: {e}")
+        logger.error(f"Full analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/system-metrics")
-async def get_system_metrics():
-    """Get real-time system metrics for the Analytics dashboard"""
-    try:
-        from src.observability import metrics, get_metrics_summary
+# Last /api/system-metrics body, refreshed in the background so the
+# endpoint never aggregates on the request path
+SYSTEM_METRICS_REFRESH_SECS = 5
+_system_metrics_snapshot: Optional[Dict[str, Any]] = None
+# Held so the loop keeps a strong reference and shutdown can cancel it
+_system_metrics_task: Optional[asyncio.Task] = None
 
+
+def compute_system_metrics() -> Dict[str, Any]:
+    """Derive the dashboard numbers from the observability summary."""
+    try:
         summary = get_metrics_summary()
+        totals = get_metrics_totals()
 
         # Calculate risk distribution from actual student data
         # For now, use the metrics data we have
-        total_requests = sum(summary.get("agent_requests", {}).values())
-        total_failures = sum(summary.get("agent_failures", {}).values())
+        total_requests = totals.agent_requests
+        total_failures = totals.agent_failures
         success_rate = (
             ((total_requests - total_failures) / total_requests * 100)
             if total_requests > 0
@@ -484,8 +574,8 @@ async def get_system_metrics():
         cache_hit_rate = (cache_hits / total_cache * 100) if total_cache > 0 else 0
 
         # Get LLM stats
-        llm_tokens = sum(summary.get("llm_tokens", {}).values())
-        llm_cost = sum(summary.get("llm_cost_usd", {}).values())
+        llm_tokens = totals.llm_tokens
+        llm_cost = totals.llm_cost_usd
 
         return {
             "total_queries": total_requests,
@@ -499,7 +589,6 @@ async def get_system_metrics():
             "llm_tokens_used": llm_tokens,
             "llm_cost_usd": round(llm_cost, 4),
             "active_requests": summary.get("active_requests", 0),
-            "timestamp": time.time(),
         }
     except Exception as e:
         logger.error(f"Error getting system metrics: {e}")
@@ -514,69 +603,96 @@ async def get_system_metrics():
             "llm_tokens_used": 0,
             "llm_cost_usd": 0,
             "active_requests": 0,
-            "timestamp": time.time(),
         }
 
 
-@app.get("/api/student-analytics")
-async def get_student_analytics():
-    """Get real student performance analytics"""
-    try:
-        # Get real class data
-        from pymongo import MongoClient
-        import certifi
-
-        MONGO_URI = os.getenv("MONGO_URI")
-        MONGO_DB = os.getenv("MONGO_DB")
-        MONGO_COLLECTION = os.getenv("MONGO_COLLECTION")
-
-        if MONGO_URI and MONGO_DB and MONGO_COLLECTION:
-            client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-            collection = client[MONGO_DB][MONGO_COLLECTION]
+async def refresh_system_metrics_task():
+    """Periodically recompute the system metrics snapshot."""
+    global _system_metrics_snapshot
+    while True:
+        try:
+            _system_metrics_snapshot = compute_system_metrics()
+        except Exception:
+            # Keep serving the previous snapshot and retry next interval
+            logger.exception("System metrics refresh failed")
+        await asyncio.sleep(SYSTEM_METRICS_REFRESH_SECS)
 
-            # Get all students with grades
-            students = list(
-                collection.find({}, {"G1": 1, "G2": 1, "G3": 1, "_id": 0}).limit(500)
-            )
 
-            # Calculate risk distribution
-            low_risk = sum(1 for s in students if s.get("G3", 0) >= 12)
-            medium_risk = sum(1 for s in students if 10 <= s.get("G3", 0) < 12)
-            high_risk = sum(1 for s in students if s.get("G3", 0) < 10)
+@app.get("/api/system-metrics")
+async def get_system_metrics():
+    """Get real-time system metrics for the Analytics dashboard"""
+    snapshot = _system_metrics_snapshot
+    if snapshot is None:
+        # Before the first background refresh (or if it never started)
+        snapshot = compute_system_metrics()
+    return {**snapshot, "timestamp": time.time()}
+
+
+_G3_OR_ZERO = {"$ifNull": ["$G3", 0]}
+
+# One $group pass: low (G3 >= 12), high (G3 < 10), total and mean G3
+RISK_PIPELINE = [
+    {
+        "$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "low": {"$sum": {"$cond": [{"$gte": [_G3_OR_ZERO, 12]}, 1, 0]}},
+            "high": {"$sum": {"$cond": [{"$lt": [_G3_OR_ZERO, 10]}, 1, 0]}},
+            "avg": {"$avg": _G3_OR_ZERO},
+        }
+    }
+]
+
+
+_EMPTY_ANALYTICS = {
+    "risk_distribution": {"low": 0, "medium": 0, "high": 0, "total": 0},
+    "grade_trend": [{"month": "Current", "avg": 0}],
+    "total_students": 0,
+}
+
+
+@cached(expire=30)
+async def _student_analytics() -> Dict[str, Any]:
+    # Raises on DB errors so a failed aggregate is never cached
+    # Reuse the pooled module-level client; use the mock branch if the
+    # connection at import time failed
+    if USE_REAL_DB and mongo_collection is not None:
+        # Bucket by G3 inside Mongo so only the four totals cross the
+        # wire; a missing grade counts as 0, as it always has
+        stats = await mongo_collection.aggregate(RISK_PIPELINE).to_list(length=1)
+        row = stats[0] if stats else {}
+        total = row.get("total", 0)
+        low_risk = row.get("low", 0)
+        high_risk = row.get("high", 0)
+        medium_risk = total - low_risk - high_risk
+        avg_g3 = row.get("avg") or 0
+
+        # Grade trend is a single current point (mock monthly data for
+        # now); in production, you'd store historical data
+        return {
+            "risk_distribution": {
+                "low": low_risk,
+                "medium": medium_risk,
+                "high": high_risk,
+                "total": total,
+            },
+            "grade_trend": [
+                {"month": "Current", "avg": round(avg_g3, 1)},
+            ],
+            "total_students": total,
+        }
+    # Return mock data if no MongoDB
+    return _EMPTY_ANALYTICS
 
-            # Calculate grade trends (mock monthly data for now)
-            # In production, you'd store historical data
-            avg_g3 = (
-                sum(s.get("G3", 0) for s in students) / len(students) if students else 0
-            )
-
-            return {
-                "risk_distribution": {
-                    "low": low_risk,
-                    "medium": medium_risk,
-                    "high": high_risk,
-                    "total": len(students),
-                },
-                "grade_trend": [
-                    {"month": "Current", "avg": round(avg_g3, 1)},
-                ],
-                "total_students": len(students),
-            }
-        else:
-            # Return mock data if no MongoDB
-            return {
-                "risk_distribution": {"low": 0, "medium": 0, "high": 0, "total": 0},
-                "grade_trend": [{"month": "Current", "avg": 0}],
-                "total_students": 0,
-            }
 
+@app.get("/api/student-analytics")
+async def get_student_analytics():
+    """Get real student performance analytics"""
+    try:
+        return await _student_analytics()
     except Exception as e:
         logger.error(f"Error getting student analytics: {e}")
-        return {
-            "risk_distribution": {"low": 0, "medium": 0, "high": 0, "total": 0},
-            "grade_trend": [{"month": "Current", "avg": 0}],
-            "total_students": 0,
-        }
+        return _EMPTY_ANALYTICS
 
 
 # Serve static files (React frontend) in production
@@ -586,9 +702,72 @@ logger.info(f"Checking for static files at: {os.path.abspath(static_dir)}")
 logger.info(f"Current working directory: {os.getcwd()}")
 logger.info(f"Directory exists: {os.path.exists(static_dir)}")
 
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header mapped to their q-values."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves a `.br`/`.gz` sibling built alongside an asset
+    when the client accepts it, so Python never compresses static bytes."""
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        has_variant = False
+        for encoding, suffix in self.ENCODINGS:
+            try:
+                compressed_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            has_variant = True
+            if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                continue
+            response = FileResponse(
+                f"{full_path}{suffix}",
+                status_code=status_code,
+                stat_result=compressed_stat,
+                method=scope["method"],
+                media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                headers={"content-encoding": encoding, "vary": "Accept-Encoding"},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if has_variant:
+            # The identity body is one of several representations of this URL
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
 if os.path.exists(static_dir):
     logger.info(f"✅ Serving static files from {static_dir}")
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+    app.mount(
+        "/",
+        PrecompressedStaticFiles(
+            directory=static_dir, html=True, follow_symlink=False
+        ),
+        name="static",
+    )
 
     # Catch-all route to serve index.html for client-side routing
     @app.get("/{full_path:path}")
@@ -0,0 +1,120 @@
+"""
+Request-path helpers for the MCP server: input validation, projection
+building and MCP metrics recording.
+
+Kept free of FastAPI/Pydantic and fully annotated so the Docker build can
+compile it to a C extension with mypyc; without the compiled module it is
+imported as plain Python and behaves the same.
+"""
+
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from src.observability import MCPResult, metrics
+
+# Allowed fields in projections (expanded for performance analysis)
+ALLOWED_FIELDS: FrozenSet[str] = frozenset(
+    {
+        # Grades
+        "G1",
+        "G2",
+        "G3",
+        # Demographics
+        "name",
+        "age",
+        "sex",
+        # Study metrics
+        "studytime",
+        "absences",
+        "failures",
+        # Behavioral indicators
+        "goout",
+        "Dalc",
+        "Walc",
+        # Other common fields
+        "school",
+        "address",
+        "famsize",
+        "Pstatus",
+        "Medu",
+        "Fedu",
+        "Mjob",
+        "Fjob",
+        "reason",
+        "guardian",
+        "traveltime",
+        "Pclass",
+        "activities",
+        "nursery",
+        "higher",
+        "internet",
+        "romantic",
+        "freetime",
+        "health",
+        "paid",
+    }
+)
+
+_PROJECTION_CACHE_MAX = 128
+_projections: Dict[FrozenSet[str], Dict[str, int]] = {}
+
+
+def is_objid(v: str) -> bool:
+    """True if v is a 24-char hex ObjectId (bytes.fromhex checks in C)."""
+    if len(v) != 24:
+        return False
+    try:
+        # fromhex skips whitespace between pairs, so check the decoded size
+        return len(bytes.fromhex(v)) == 12
+    except ValueError:
+        return False
+
+
+def invalid_fields(fields: List[str]) -> List[str]:
+    """Requested fields outside ALLOWED_FIELDS, in request order."""
+    if ALLOWED_FIELDS.issuperset(fields):
+        return []
+    return [f for f in fields if f not in ALLOWED_FIELDS]
+
+
+def projection_for(fields: List[str]) -> Dict[str, int]:
+    # Clients send a handful of recurring field sets; build each projection
+    # once. _id is never exposed. Callers must not mutate the result.
+    key = frozenset(fields)
+    proj = _projections.get(key)
+    if proj is None:
+        if len(_projections) >= _PROJECTION_CACHE_MAX:
+            _projections.clear()
+        proj = {f: 1 for f in key}
+        proj["_id"] = 0
+        _projections[key] = proj
+    return proj
+
+
+def student_cache_key(prefix: str, student_id: str, fields: List[str]) -> str:
+    """Cache key for one projected student document.
+
+    Insensitive to field order and to the case of the hex id, so /query
+    and /query_batch share entries.
+    """
+    return f"{prefix}:stu:{student_id.lower()}:{','.join(sorted(fields))}"
+
+
+def project(doc: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Apply a projection to an in-memory (mock) document."""
+    return {k: doc[k] for k in fields if k in doc}
+
+
+def stringify_ids(students: List[Dict[str, Any]]) -> None:
+    # .binary.hex() is str(ObjectId) without the __str__ dispatch
+    for s in students:
+        s["_id"] = s["_id"].binary.hex()
+
+
+def record_mcp_result(
+    status: str, duration: float, rejected: Optional[str] = None
+) -> None:
+    """Count one MCP request under `status` and record its latency.
+
+    `rejected` additionally counts it under mcp_rejected_requests_total.
+    """
+    metrics.record_mcp(MCPResult(status, duration, rejected))
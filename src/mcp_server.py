@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
-import re
+from typing import Dict, List, Optional
+import asyncio
+import orjson
 import time
 import logging
 import os
@@ -9,54 +11,35 @@ from dotenv import load_dotenv
 
 # Observability imports
 from src.observability import metrics, tracer, MCPStatus, NodeType, record_llm_usage
+from src.response_cache import (
+    CACHE_PREFIX,
+    cache_get,
+    cache_get_many,
+    cache_set,
+    cache_set_many,
+)
+from src.response_cache import router as cache_router
+from src.mcp_core import (
+    invalid_fields,
+    is_objid,
+    project,
+    projection_for,
+    record_mcp_result,
+    stringify_ids,
+    student_cache_key,
+)
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mcp_server")
 
-app = FastAPI(title="MCP Mongo Read-Only MCP")
-
-# Allowed fields in projections (expanded for performance analysis)
-ALLOWED_FIELDS = {
-    # Grades
-    "G1",
-    "G2",
-    "G3",
-    # Demographics
-    "name",
-    "age",
-    "sex",
-    # Study metrics
-    "studytime",
-    "absences",
-    "failures",
-    # Behavioral indicators
-    "goout",
-    "Dalc",
-    "Walc",
-    # Other common fields
-    "school",
-    "address",
-    "famsize",
-    "Pstatus",
-    "Medu",
-    "Fedu",
-    "Mjob",
-    "Fjob",
-    "reason",
-    "guardian",
-    "traveltime",
-    "Pclass",
-    "activities",
-    "nursery",
-    "higher",
-    "internet",
-    "romantic",
-    "freetime",
-    "health",
-    "paid",
-}
+app = FastAPI(
+    title="MCP Mongo Read-Only MCP", default_response_class=ORJSONResponse
+)
+# Its response cache is per process without Redis, so it needs its own
+# /admin/cache/invalidate
+app.include_router(cache_router)
 
 # In-memory mock DB keyed by 24-hex ObjectId strings (fallback)
 MOCK_DB = {
@@ -64,7 +47,6 @@ MOCK_DB = {
     "5f43a1a8b2b2b2b2b2b2b2b2": {"name": "Bob", "age": 18, "sex": "M", "G3": 15},
 }
 
-OBJID_RE = re.compile(r"^[0-9a-fA-F]{24}$")
 
 # Optional real Mongo configuration (read from environment)
 MONGO_URI = os.getenv("MONGO_URI")
@@ -72,16 +54,56 @@ MONGO_DB = os.getenv("MONGO_DB")
 MONGO_COLLECTION = os.getenv("MONGO_COLLECTION")
 
 USE_REAL_DB = False
+mongo_client = None
 mongo_collection = None
 
+# Connection-pool bounds for the read-only MCP workload: keep a couple of
+# sockets warm and fail fast instead of queueing behind a saturated pool
+MONGO_POOL_OPTIONS = {
+    "maxPoolSize": 10,
+    "minPoolSize": 2,
+    "waitQueueTimeoutMS": 2000,
+    "serverSelectionTimeoutMS": 3000,
+    "maxIdleTimeMS": 60000,
+}
+
+
+def _wire_compressors() -> str:
+    # zstd/snappy need their optional packages; zlib is always available
+    names = []
+    for name, module in (("zstd", "zstandard"), ("snappy", "snappy")):
+        try:
+            __import__(module)
+            names.append(name)
+        except ImportError:
+            pass
+    names.append("zlib")
+    return ",".join(names)
+
+
+# Every MCP route is a read, so secondaries may serve them; set
+# MONGO_READ_PREFERENCE=primary to read only from the primary
+MONGO_READ_OPTIONS = {
+    "compressors": _wire_compressors(),
+    "readPreference": os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred"),
+    "retryReads": True,
+}
+
 if MONGO_URI and MONGO_DB and MONGO_COLLECTION:
     try:
-        from pymongo import MongoClient
+        # Motor keeps handlers on the event loop instead of blocking a
+        # threadpool worker for every round trip
+        from motor.motor_asyncio import AsyncIOMotorClient
         from bson import ObjectId
         import certifi
 
-        client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-        mongo_collection = client[MONGO_DB][MONGO_COLLECTION]
+        mongo_client = AsyncIOMotorClient(
+            MONGO_URI,
+            tlsCAFile=certifi.where(),
+            **MONGO_POOL_OPTIONS,
+            **MONGO_READ_OPTIONS,
+        )
+        mongo_collection = mongo_client[MONGO_DB][MONGO_COLLECTION]
         USE_REAL_DB = True
         logger.info("mcp_server: configured to use real MongoDB collection")
     except Exception:
@@ -95,13 +117,99 @@ else:
     )
 
 
+# Compound index that covers the agent's per-query-type projections
+# (single_student: G1-G3 + studytime; trend: G1-G3; derived_metrics: G3,
+# studytime, absences, failures, goout, Dalc, Walc). A /query whose fields
+# all fall in COVERED_FIELDS is answered from the index alone, without
+# fetching the document. "name" is deliberately left out.
+_COVERED_FIELD_ORDER = [
+    "G1",
+    "G2",
+    "G3",
+    "studytime",
+    "absences",
+    "failures",
+    "goout",
+    "Dalc",
+    "Walc",
+]
+COVERED_FIELDS = frozenset(_COVERED_FIELD_ORDER)
+COVERING_INDEX_NAME = "mcp_student_covering"
+COVERING_INDEX_KEYS = [("_id", 1)] + [(f, 1) for f in _COVERED_FIELD_ORDER]
+covering_index_ready = False
+
+# Hot (student_id, fields) lookups are served from the shared response
+# cache (Redis when REDIS_URL is set) and only hit MongoDB on a miss
+QUERY_CACHE_TTL_SECS = int(os.getenv("MCP_QUERY_CACHE_TTL_SECS", "300"))
+
+
+# /class_analysis reads a roster slice with a fixed projection. An index
+# led by _id with exactly those fields turns it into a covered index scan
+# in _id order (the same students the natural-order scan returned).
+_CLASS_FIELD_ORDER = [
+    "name",
+    "G1",
+    "G2",
+    "G3",
+    "studytime",
+    "absences",
+    "failures",
+]
+CLASS_PROJECTION = {"_id": 1, **{f: 1 for f in _CLASS_FIELD_ORDER}}
+CLASS_INDEX_NAME = "mcp_class_covering"
+CLASS_INDEX_KEYS = [("_id", 1)] + [(f, 1) for f in _CLASS_FIELD_ORDER]
+class_index_ready = False
+
+# The roster changes rarely, so an encoded /class_analysis page is cached
+# per limit and served as-is until it expires or /admin/cache/invalidate
+# is called on this server
+CLASS_CACHE_TTL_SECS = int(os.getenv("MCP_CLASS_CACHE_TTL_SECS", "60"))
+
+
+async def _create_index(keys: list, name: str) -> bool:
+    try:
+        await mongo_collection.create_index(keys, name=name)
+        return True
+    except Exception as e:
+        logger.warning(f"mcp_server: index {name} unavailable: {e}")
+        return False
+
+
+async def ensure_covering_index() -> bool:
+    """Create the covering indexes if needed; queries only hint them once present.
+
+    The MCP user may be read-only, in which case lookups simply run
+    uncovered on the _id index.
+    """
+    global covering_index_ready, class_index_ready
+    if not USE_REAL_DB or mongo_collection is None:
+        return False
+    covering_index_ready = await _create_index(
+        COVERING_INDEX_KEYS, COVERING_INDEX_NAME
+    )
+    class_index_ready = await _create_index(CLASS_INDEX_KEYS, CLASS_INDEX_NAME)
+    return covering_index_ready and class_index_ready
+
+
+async def warmup_db() -> bool:
+    """Ping MongoDB so server selection and the TLS handshake happen up front."""
+    if not USE_REAL_DB or mongo_client is None:
+        return False
+    try:
+        await mongo_client.admin.command("ping")
+        return True
+    except Exception as e:
+        logger.warning(f"mcp_server: MongoDB warmup ping failed: {e}")
+        return False
+
+
 class QueryRequest(BaseModel):
     student_id: str = Field(..., description="24-hex Mongo ObjectId string")
     fields: List[str] = Field(..., description="Projection fields to return")
 
     @validator("student_id")
     def valid_objid(cls, v):
-        if not OBJID_RE.match(v):
+        if not is_objid(v):
             raise ValueError("student_id must be a 24-hex string")
         return v
 
@@ -109,7 +217,7 @@ class QueryRequest(BaseModel):
     def fields_allowed(cls, v):
         if not v:
             raise ValueError("fields must be a non-empty list")
-        invalid = [f for f in v if f not in ALLOWED_FIELDS]
+        invalid = invalid_fields(v)
         if invalid:
             raise ValueError(f"invalid projection fields: {invalid}")
         return v
@@ -121,9 +229,23 @@ class QueryResponse(BaseModel):
     error: Optional[str] = None
 
 
-@app.post("/query", response_model=QueryResponse)
-def query_student(q: QueryRequest):
-    start = time.time()
+@app.on_event("startup")
+async def warmup_on_startup():
+    # Pay the Mongo handshake before the first request, not inside it
+    if await warmup_db():
+        await ensure_covering_index()
+
+
+@app.get("/health")
+def health_check():
+    # Liveness only: never touches the database so probes stay cheap
+    return {"status": "healthy"}
+
+
+async def _query(q: QueryRequest) -> dict:
+    # Builds the QueryResponse payload as a plain dict; the values are
+    # server-built, so the routes skip response-model validation
+    start = time.perf_counter()
     node = "Mongo MCP Tool Node"
 
     # Start MCP span (child of agent trace if propagated)
@@ -132,102 +254,112 @@ def query_student(q: QueryRequest):
     span.set_attribute("field_count", len(q.fields))
 
     try:
-        logger.info(f"{node} - start - student_id={q.student_id} fields={q.fields}")
+        logger.info(
+            "%s - start - student_id=%s fields=%s", node, q.student_id, q.fields
+        )
 
         # If configured, use real MongoDB (read-only via projection)
         if USE_REAL_DB and mongo_collection is not None:
             try:
-                proj = {f: 1 for f in q.fields}
-                # Ensure _id is not returned unless requested (we don't expose it)
-                proj["_id"] = 0
-                doc = mongo_collection.find_one({"_id": ObjectId(q.student_id)}, proj)
+                cache_key = student_cache_key(CACHE_PREFIX, q.student_id, q.fields)
+                hit = await cache_get(cache_key)
+                if hit is not None:
+                    metrics.inc("cache_hits")
+                    duration = time.perf_counter() - start
+
+                    record_mcp_result(MCPStatus.SUCCESS.value, duration)
+                    span.set_attribute("found", True)
+                    span.set_attribute("source", "cache")
+                    tracer.end_span(span)
+
+                    logger.info("%s - success (cache) - duration=%.4fs", node, duration)
+                    return {
+                        "student_id": q.student_id,
+                        "result": orjson.loads(hit),
+                        "error": None,
+                    }
+                metrics.inc("cache_misses")
+
+                proj = projection_for(q.fields)
+                # The validator already checked the hex; build from the
+                # 12 raw bytes instead of re-parsing the string in bson
+                find_opts = {}
+                if covering_index_ready and COVERED_FIELDS.issuperset(q.fields):
+                    find_opts["hint"] = COVERING_INDEX_NAME
+                doc = await mongo_collection.find_one(
+                    {"_id": ObjectId(bytes.fromhex(q.student_id))}, proj, **find_opts
+                )
                 if doc is None:
-                    duration = time.time() - start
+                    duration = time.perf_counter() - start
 
                     # Record metrics
-                    metrics.increment_counter(
-                        metrics.mcp_requests_total, MCPStatus.NOT_FOUND.value
-                    )
-                    metrics.record_simple_histogram(
-                        metrics.mcp_latency_seconds, duration
-                    )
+                    record_mcp_result(MCPStatus.NOT_FOUND.value, duration)
                     span.set_attribute("found", False)
                     tracer.end_span(span)
 
-                    logger.info(f"{node} - empty - duration={duration:.4f}s")
-                    return QueryResponse(student_id=q.student_id, result=None)
+                    logger.info("%s - empty - duration=%.4fs", node, duration)
+                    return {"student_id": q.student_id, "result": None, "error": None}
                 # Only return the projection keys
-                duration = time.time() - start
+                await cache_set(cache_key, orjson.dumps(doc), QUERY_CACHE_TTL_SECS)
+                duration = time.perf_counter() - start
 
                 # Record success metrics
-                metrics.increment_counter(
-                    metrics.mcp_requests_total, MCPStatus.SUCCESS.value
-                )
-                metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+                record_mcp_result(MCPStatus.SUCCESS.value, duration)
                 span.set_attribute("found", True)
                 span.set_attribute("doc_size", len(str(doc)))
                 tracer.end_span(span)
 
-                logger.info(f"{node} - success (real db) - duration={duration:.4f}s")
-                return QueryResponse(student_id=q.student_id, result=doc)
+                logger.info("%s - success (real db) - duration=%.4fs", node, duration)
+                return {"student_id": q.student_id, "result": doc, "error": None}
             except Exception as e:
-                duration = time.time() - start
+                duration = time.perf_counter() - start
                 logger.exception(f"{node} - db_error - {e} - duration={duration:.4f}s")
                 raise HTTPException(status_code=500, detail="internal MCP DB error")
 
         # Fallback to mock DB
         doc = MOCK_DB.get(q.student_id)
         if doc is None:
-            duration = time.time() - start
+            duration = time.perf_counter() - start
 
             # Record metrics
-            metrics.increment_counter(
-                metrics.mcp_requests_total, MCPStatus.NOT_FOUND.value
-            )
-            metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+            record_mcp_result(MCPStatus.NOT_FOUND.value, duration)
             span.set_attribute("found", False)
             span.set_attribute("source", "mock")
             tracer.end_span(span)
 
-            logger.info(f"{node} - empty (mock) - duration={duration:.4f}s")
-            return QueryResponse(student_id=q.student_id, result=None)
+            logger.info("%s - empty (mock) - duration=%.4fs", node, duration)
+            return {"student_id": q.student_id, "result": None, "error": None}
 
-        projected = {k: doc[k] for k in q.fields if k in doc}
-        duration = time.time() - start
+        projected = project(doc, q.fields)
+        duration = time.perf_counter() - start
 
         # Record success metrics
-        metrics.increment_counter(metrics.mcp_requests_total, MCPStatus.SUCCESS.value)
-        metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+        record_mcp_result(MCPStatus.SUCCESS.value, duration)
         span.set_attribute("found", True)
         span.set_attribute("source", "mock")
         tracer.end_span(span)
 
-        logger.info(f"{node} - success (mock) - duration={duration:.4f}s")
-        return QueryResponse(student_id=q.student_id, result=projected)
+        logger.info("%s - success (mock) - duration=%.4fs", node, duration)
+        return {"student_id": q.student_id, "result": projected, "error": None}
 
     except ValueError as e:
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record validation error
-        metrics.increment_counter(
-            metrics.mcp_requests_total, MCPStatus.VALIDATION_REJECT.value
-        )
-        metrics.increment_counter(
-            metrics.mcp_rejected_requests_total, "validation_error"
+        record_mcp_result(
+            MCPStatus.VALIDATION_REJECT.value, duration, rejected="validation_error"
         )
-        metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
         span.set_attribute("error_type", "validation")
         span.set_status("error")
         tracer.end_span(span)
 
-        logger.info(f"{node} - validation_error - {e} - duration={duration:.4f}s")
+        logger.info("%s - validation_error - %s - duration=%.4fs", node, e, duration)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record error metrics
-        metrics.increment_counter(metrics.mcp_requests_total, MCPStatus.ERROR.value)
-        metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+        record_mcp_result(MCPStatus.ERROR.value, duration)
         span.set_attribute("error_type", type(e).__name__)
         span.set_status("error")
         tracer.end_span(span)
@@ -236,6 +368,164 @@ def query_student(q: QueryRequest):
         raise HTTPException(status_code=500, detail="internal MCP error")
 
 
+@app.post("/query", responses={200: {"model": QueryResponse}})
+async def query_student(q: QueryRequest):
+    return ORJSONResponse(await _query(q))
+
+
+class QueryBatchRequest(BaseModel):
+    queries: List[QueryRequest] = Field(
+        ..., description="Single-student queries to run in one round trip"
+    )
+
+
+class QueryBatchItem(QueryResponse):
+    status_code: int = Field(
+        default=200, description="HTTP status the single /query call would return"
+    )
+
+
+class QueryBatchResponse(BaseModel):
+    results: List[QueryBatchItem] = Field(description="One result per query, in order")
+
+
+async def _batch_item(q: QueryRequest) -> dict:
+    # Mock DB: reuse the single-query path (metrics, spans); a failing
+    # lookup is reported in its own slot instead of failing the whole batch
+    try:
+        return {**(await _query(q)), "status_code": 200}
+    except HTTPException as e:
+        return {
+            "student_id": q.student_id,
+            "result": None,
+            "error": e.detail,
+            "status_code": e.status_code,
+        }
+
+
+async def _find_many(fields: List[str], ids: List[str]) -> Dict[str, dict]:
+    """Projected documents for `ids` keyed by lowercase id; absent if not found.
+
+    Cached documents are served first (one MGET with Redis); every miss is
+    fetched with a single $in query and written back in one pipeline.
+    """
+    ids = list(dict.fromkeys(i.lower() for i in ids))
+    keys = [student_cache_key(CACHE_PREFIX, i, fields) for i in ids]
+    hits = await cache_get_many(keys)
+
+    found: Dict[str, dict] = {}
+    missing = []
+    for sid, hit in zip(ids, hits):
+        if hit is not None:
+            found[sid] = orjson.loads(hit)
+        else:
+            missing.append(sid)
+    metrics.inc("cache_hits", len(found))
+    metrics.inc("cache_misses", len(missing))
+    if not missing:
+        return found
+
+    # _id stays in the projection so each document maps back to its query
+    proj = {**projection_for(fields), "_id": 1}
+    find_opts = {}
+    if covering_index_ready and COVERED_FIELDS.issuperset(fields):
+        find_opts["hint"] = COVERING_INDEX_NAME
+    cursor = mongo_collection.find(
+        {"_id": {"$in": [ObjectId(bytes.fromhex(i)) for i in missing]}},
+        proj,
+        **find_opts,
+    ).batch_size(len(missing))
+    fetched = {}
+    for doc in await cursor.to_list(length=len(missing)):
+        sid = doc.pop("_id").binary.hex()
+        found[sid] = doc
+        fetched[student_cache_key(CACHE_PREFIX, sid, fields)] = orjson.dumps(doc)
+    if fetched:
+        await cache_set_many(fetched, QUERY_CACHE_TTL_SECS)
+    return found
+
+
+@app.post("/query_batch", responses={200: {"model": QueryBatchResponse}})
+async def query_student_batch(req: QueryBatchRequest):
+    start = time.perf_counter()
+    node = "Mongo MCP Batch Query Node"
+    logger.info("%s - start - count=%s", node, len(req.queries))
+
+    if not USE_REAL_DB or mongo_collection is None:
+        # Mock lookups are in-memory; gather keeps results in query order
+        results = await asyncio.gather(*(_batch_item(q) for q in req.queries))
+        return ORJSONResponse({"results": results})
+
+    span = tracer.start_span("mcp.mongo_query")
+    span.set_attribute("query_type", "batch")
+    span.set_attribute("count", len(req.queries))
+
+    # One $in query per distinct projection instead of a find_one per id
+    field_keys = [tuple(sorted(q.fields)) for q in req.queries]
+    groups: Dict[tuple, List[str]] = {}
+    for q, fields in zip(req.queries, field_keys):
+        groups.setdefault(fields, []).append(q.student_id)
+
+    try:
+        fetched = await asyncio.gather(
+            *(_find_many(list(fields), ids) for fields, ids in groups.items())
+        )
+    except Exception as e:
+        duration = time.perf_counter() - start
+        for _ in req.queries:
+            record_mcp_result(MCPStatus.ERROR.value, duration)
+        span.set_attribute("error_type", type(e).__name__)
+        span.set_status("error")
+        tracer.end_span(span)
+
+        logger.exception(f"{node} - db_error - {e} - duration={duration:.4f}s")
+        results = [
+            {
+                "student_id": q.student_id,
+                "result": None,
+                "error": "internal MCP DB error",
+                "status_code": 500,
+            }
+            for q in req.queries
+        ]
+        return ORJSONResponse({"results": results})
+
+    by_fields = dict(zip(groups, fetched))
+    duration = time.perf_counter() - start
+
+    results = []
+    found_count = 0
+    for q, fields in zip(req.queries, field_keys):
+        doc = by_fields[fields].get(q.student_id.lower())
+        if doc is not None:
+            found_count += 1
+        record_mcp_result(
+            (MCPStatus.SUCCESS if doc is not None else MCPStatus.NOT_FOUND).value,
+            duration,
+        )
+        results.append(
+            {
+                "student_id": q.student_id,
+                "result": doc,
+                "error": None,
+                "status_code": 200,
+            }
+        )
+    span.set_attribute("found", found_count)
+    span.set_attribute("queries", len(groups))
+    tracer.end_span(span)
+
+    logger.info(
+        "%s - success - found=%s/%s queries=%s - duration=%.4fs",
+        node,
+        found_count,
+        len(results),
+        len(groups),
+        duration,
+    )
+    return ORJSONResponse({"results": results})
+
+
 class ClassAnalysisRequest(BaseModel):
     limit: int = Field(default=100, description="Max students to fetch")
 
@@ -245,9 +535,9 @@ class ClassAnalysisResponse(BaseModel):
     count: int = Field(description="Number of students returned")
 
 
-@app.post("/class_analysis", response_model=ClassAnalysisResponse)
-def class_analysis_endpoint(req: ClassAnalysisRequest):
-    start = time.time()
+@app.post("/class_analysis", responses={200: {"model": ClassAnalysisResponse}})
+async def class_analysis_endpoint(req: ClassAnalysisRequest):
+    start = time.perf_counter()
     node = "Mongo MCP Class Analysis Node"
 
     # Start MCP span for class analysis
@@ -256,49 +546,56 @@ def class_analysis_endpoint(req: ClassAnalysisRequest):
     span.set_attribute("limit", req.limit)
 
     try:
-        logger.info(f"{node} - start - limit={req.limit}")
+        logger.info("%s - start - limit=%s", node, req.limit)
 
         if USE_REAL_DB and mongo_collection is not None:
             try:
-                # Fetch limited students with key fields for analysis
-                proj = {
-                    "_id": 1,
-                    "name": 1,
-                    "G1": 1,
-                    "G2": 1,
-                    "G3": 1,
-                    "studytime": 1,
-                    "absences": 1,
-                    "failures": 1,
-                }
-                students = list(mongo_collection.find({}, proj).limit(req.limit))
-                # Convert ObjectId to string
-                for s in students:
-                    s["_id"] = str(s["_id"])
+                cache_key = f"{CACHE_PREFIX}:class:{req.limit}"
+                hit = await cache_get(cache_key)
+                if hit is not None:
+                    metrics.inc("cache_hits")
+                    duration = time.perf_counter() - start
+
+                    record_mcp_result(MCPStatus.SUCCESS.value, duration)
+                    span.set_attribute("source", "cache")
+                    tracer.end_span(span)
+
+                    logger.info("%s - success (cache) - duration=%.4fs", node, duration)
+                    return Response(hit, media_type="application/json")
+                metrics.inc("cache_misses")
+
+                # Fetch limited students with key fields for analysis.
+                # One batch for the whole page: no getMore round trips past
+                # the server's 101-document first batch
+                cursor = (
+                    mongo_collection.find({}, CLASS_PROJECTION)
+                    .limit(req.limit)
+                    .batch_size(req.limit)
+                )
+                if class_index_ready:
+                    cursor = cursor.sort("_id", 1).hint(CLASS_INDEX_NAME)
+                students = await cursor.to_list(length=req.limit)
+                stringify_ids(students)
                 count = len(students)
-                duration = time.time() - start
+                body = orjson.dumps({"students": students, "count": count})
+                await cache_set(cache_key, body, CLASS_CACHE_TTL_SECS)
+                duration = time.perf_counter() - start
 
                 # Record success metrics
-                metrics.increment_counter(
-                    metrics.mcp_requests_total, MCPStatus.SUCCESS.value
-                )
-                metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+                record_mcp_result(MCPStatus.SUCCESS.value, duration)
                 span.set_attribute("student_count", count)
                 span.set_attribute("source", "mongodb")
                 tracer.end_span(span)
 
                 logger.info(
-                    f"{node} - success - count={count} - duration={duration:.4f}s"
+                    "%s - success - count=%s - duration=%.4fs", node, count, duration
                 )
-                return ClassAnalysisResponse(students=students, count=count)
+                return Response(body, media_type="application/json")
             except Exception as e:
-                duration = time.time() - start
+                duration = time.perf_counter() - start
 
                 # Record error metrics
-                metrics.increment_counter(
-                    metrics.mcp_requests_total, MCPStatus.ERROR.value
-                )
-                metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+                record_mcp_result(MCPStatus.ERROR.value, duration)
                 span.set_attribute("error_type", type(e).__name__)
                 span.set_status("error")
                 tracer.end_span(span)
@@ -309,26 +606,24 @@ def class_analysis_endpoint(req: ClassAnalysisRequest):
         # Fallback: return mock DB
         students = [{"_id": k, **v} for k, v in MOCK_DB.items()]
         count = len(students)
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record success metrics (mock)
-        metrics.increment_counter(metrics.mcp_requests_total, MCPStatus.SUCCESS.value)
-        metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+        record_mcp_result(MCPStatus.SUCCESS.value, duration)
         span.set_attribute("student_count", count)
         span.set_attribute("source", "mock")
         tracer.end_span(span)
 
         logger.info(
-            f"{node} - success (mock) - count={len(students)} - duration={duration:.4f}s"
+            "%s - success (mock) - count=%s - duration=%.4fs", node, count, duration
         )
-        return ClassAnalysisResponse(students=students, count=len(students))
+        return ORJSONResponse({"students": students, "count": count})
 
     except Exception as e:
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Record error metrics
-        metrics.increment_counter(metrics.mcp_requests_total, MCPStatus.ERROR.value)
-        metrics.record_simple_histogram(metrics.mcp_latency_seconds, duration)
+        record_mcp_result(MCPStatus.ERROR.value, duration)
         span.set_attribute("error_type", type(e).__name__)
         span.set_status("error")
         tracer.end_span(span)
@@ -3,225 +3,192 @@ Prometheus metrics exporter for MCP Agent observability.
 Exposes metrics in Prometheus exposition format.
 """
 
-from fastapi import APIRouter, Response
-from typing import List
+from fastapi import APIRouter
+from fastapi.responses import Response
+from typing import Iterator
 import time
 from src.observability import metrics
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
-def format_counter(name: str, labels: dict, value: int, help_text: str = "") -> str:
-    """Format a counter metric in Prometheus format."""
-    lines = []
+def format_counter(
+    name: str, labels: dict, value: int, help_text: str = ""
+) -> Iterator[str]:
+    """Yield the lines of a counter metric in Prometheus format."""
     if help_text:
-        lines.append(f"# HELP {name} {help_text}")
-    lines.append(f"# TYPE {name} counter")
+        yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} counter"
 
     for label_key, label_values in labels.items():
         if isinstance(label_values, dict):
             for label_val, count in label_values.items():
-                lines.append(f'{name}{{label="{label_val}"}} {count}')
+                yield f'{name}{{label="{label_val}"}} {count}'
         else:
-            lines.append(f"{name} {label_values}")
+            yield f"{name} {label_values}"
 
-    return "\n".join(lines)
 
-
-def format_histogram(name: str, data: dict, help_text: str = "") -> str:
-    """Format a histogram metric in Prometheus format."""
-    lines = []
+def format_histogram(name: str, data: dict, help_text: str = "") -> Iterator[str]:
+    """Yield the lines of a histogram metric in Prometheus format."""
     if help_text:
-        lines.append(f"# HELP {name} {help_text}")
-    lines.append(f"# TYPE {name} histogram")
+        yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} histogram"
 
     if isinstance(data, dict):
         # Dict-based histogram with labels
-        for label, values in data.items():
-            if isinstance(values, list) and values:
-                # Calculate buckets
-                count = len(values)
-                total = sum(values)
-                avg = total / count
-
-                lines.append(f'{name}_count{{node="{label}"}} {count}')
-                lines.append(f'{name}_sum{{node="{label}"}} {total}')
-                lines.append(f'{name}_avg{{node="{label}"}} {avg}')
-    elif isinstance(data, list) and data:
-        # Simple list-based histogram
-        count = len(data)
-        total = sum(data)
-        avg = total / count
-
-        lines.append(f"{name}_count {count}")
-        lines.append(f"{name}_sum {total}")
-        lines.append(f"{name}_avg {avg}")
-
-    return "\n".join(lines)
-
-
-def format_gauge(name: str, value: float, help_text: str = "") -> str:
-    """Format a gauge metric in Prometheus format."""
-    lines = []
+        for label, hist in data.items():
+            if hist.count:
+                for le, count in hist.cumulative():
+                    yield f'{name}_bucket{{node="{label}",le="{le}"}} {count}'
+                yield f'{name}_count{{node="{label}"}} {hist.count}'
+                yield f'{name}_sum{{node="{label}"}} {hist.sum}'
+                yield f'{name}_avg{{node="{label}"}} {hist.sum / hist.count}'
+    elif data.count:
+        # Unlabelled histogram
+        for le, count in data.cumulative():
+            yield f'{name}_bucket{{le="{le}"}} {count}'
+        yield f"{name}_count {data.count}"
+        yield f"{name}_sum {data.sum}"
+        yield f"{name}_avg {data.sum / data.count}"
+
+
+def format_gauge(name: str, value: float, help_text: str = "") -> Iterator[str]:
+    """Yield the lines of a gauge metric in Prometheus format."""
     if help_text:
-        lines.append(f"# HELP {name} {help_text}")
-    lines.append(f"# TYPE {name} gauge")
-    lines.append(f"{name} {value}")
-    return "\n".join(lines)
+        yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} gauge"
+    yield f"{name} {value}"
 
 
-@router.get("")
-async def prometheus_metrics():
-    """Expose metrics in Prometheus format."""
-    output_lines = []
+def format_llm_cost(name: str, costs: dict, help_text: str = "") -> Iterator[str]:
+    """Yield the per-model LLM cost counter with fixed 6-decimal values."""
+    if help_text:
+        yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} counter"
+    for model, cost in costs.items():
+        yield f'{name}{{model="{model}"}} {cost:.6f}'
 
+
+def metric_families() -> Iterator[Iterator[str]]:
+    """Yield each metric family's line generator, in exposition order."""
     # Agent Request Counters
-    output_lines.append(
-        format_counter(
-            "agent_requests_total",
-            {"query_type": metrics.agent_requests_total},
-            0,
-            "Total number of agent requests by query type",
-        )
+    yield format_counter(
+        "agent_requests_total",
+        {"query_type": metrics.agent_requests_total},
+        0,
+        "Total number of agent requests by query type",
     )
-    output_lines.append("")
 
     # Agent Failure Counters
-    output_lines.append(
-        format_counter(
-            "agent_failures_total",
-            {"node_reason": metrics.agent_failures_total},
-            0,
-            "Total number of agent failures by node and reason",
-        )
+    yield format_counter(
+        "agent_failures_total",
+        {"node_reason": metrics.agent_failures_total},
+        0,
+        "Total number of agent failures by node and reason",
     )
-    output_lines.append("")
 
     # MCP Request Counters
-    output_lines.append(
-        format_counter(
-            "mcp_requests_total",
-            {"status": metrics.mcp_requests_total},
-            0,
-            "Total number of MCP requests by status",
-        )
+    yield format_counter(
+        "mcp_requests_total",
+        {"status": metrics.mcp_requests_total},
+        0,
+        "Total number of MCP requests by status",
     )
-    output_lines.append("")
 
     # MCP Rejected Request Counters
-    output_lines.append(
-        format_counter(
-            "mcp_rejected_requests_total",
-            {"reason": metrics.mcp_rejected_requests_total},
-            0,
-            "Total number of rejected MCP requests by reason",
-        )
+    yield format_counter(
+        "mcp_rejected_requests_total",
+        {"reason": metrics.mcp_rejected_requests_total},
+        0,
+        "Total number of rejected MCP requests by reason",
     )
-    output_lines.append("")
 
     # LLM Call Counters
-    output_lines.append(
-        format_counter(
-            "llm_calls_total",
-            {"model": metrics.llm_calls_total},
-            0,
-            "Total number of LLM API calls by model",
-        )
+    yield format_counter(
+        "llm_calls_total",
+        {"model": metrics.llm_calls_total},
+        0,
+        "Total number of LLM API calls by model",
     )
-    output_lines.append("")
 
     # LLM Failure Counters
-    output_lines.append(
-        format_counter(
-            "llm_failures_total",
-            {"reason": metrics.llm_failures_total},
-            0,
-            "Total number of LLM call failures by reason",
-        )
+    yield format_counter(
+        "llm_failures_total",
+        {"reason": metrics.llm_failures_total},
+        0,
+        "Total number of LLM call failures by reason",
     )
-    output_lines.append("")
 
     # LLM Token Counter
-    output_lines.append(
-        format_counter(
-            "llm_tokens_total",
-            {"model": metrics.llm_tokens_total},
-            0,
-            "Total number of LLM tokens used by model",
-        )
+    yield format_counter(
+        "llm_tokens_total",
+        {"model": metrics.llm_tokens_total},
+        0,
+        "Total number of LLM tokens used by model",
     )
-    output_lines.append("")
 
     # LLM Cost Counter
-    output_lines.append("# HELP llm_cost_usd_total Total LLM cost in USD by model")
-    output_lines.append("# TYPE llm_cost_usd_total counter")
-    for model, cost in metrics.llm_cost_usd_total.items():
-        output_lines.append(f'llm_cost_usd_total{{model="{model}"}} {cost:.6f}')
-    output_lines.append("")
+    yield format_llm_cost(
+        "llm_cost_usd_total",
+        metrics.llm_cost_usd_total,
+        "Total LLM cost in USD by model",
+    )
 
     # Agent Latency Histogram
-    output_lines.append(
-        format_histogram(
-            "agent_latency_seconds",
-            metrics.agent_latency_seconds,
-            "Agent node execution latency in seconds",
-        )
+    yield format_histogram(
+        "agent_latency_seconds",
+        metrics.agent_latency_seconds,
+        "Agent node execution latency in seconds",
     )
-    output_lines.append("")
 
     # MCP Latency Histogram
-    output_lines.append(
-        format_histogram(
-            "mcp_latency_seconds",
-            metrics.mcp_latency_seconds,
-            "MCP call latency in seconds",
-        )
+    yield format_histogram(
+        "mcp_latency_seconds",
+        metrics.mcp_latency_seconds,
+        "MCP call latency in seconds",
     )
-    output_lines.append("")
 
     # LLM Latency Histogram
-    output_lines.append(
-        format_histogram(
-            "llm_latency_seconds",
-            metrics.llm_latency_seconds,
-            "LLM call latency in seconds",
-        )
+    yield format_histogram(
+        "llm_latency_seconds",
+        metrics.llm_latency_seconds,
+        "LLM call latency in seconds",
     )
-    output_lines.append("")
 
     # Analysis Latency Histogram
-    output_lines.append(
-        format_histogram(
-            "analysis_latency_seconds",
-            metrics.analysis_latency_seconds,
-            "Analysis operation latency in seconds",
-        )
+    yield format_histogram(
+        "analysis_latency_seconds",
+        metrics.analysis_latency_seconds,
+        "Analysis operation latency in seconds",
     )
-    output_lines.append("")
 
     # Gauges
-    output_lines.append(
-        format_gauge(
-            "agent_active_requests",
-            metrics.agent_active_requests,
-            "Number of currently active agent requests",
-        )
+    yield format_gauge(
+        "agent_active_requests",
+        metrics.agent_active_requests,
+        "Number of currently active agent requests",
     )
-    output_lines.append("")
-
-    output_lines.append(
-        format_gauge(
-            "cache_hits_total", metrics.cache_hits, "Total number of cache hits"
-        )
+    yield format_gauge(
+        "cache_hits_total", metrics.cache_hits, "Total number of cache hits"
     )
-    output_lines.append("")
-
-    output_lines.append(
-        format_gauge(
-            "cache_misses_total", metrics.cache_misses, "Total number of cache misses"
-        )
+    yield format_gauge(
+        "cache_misses_total", metrics.cache_misses, "Total number of cache misses"
+    )
+    yield format_gauge(
+        "intent_cache_hits_total",
+        metrics.intent_cache_hits,
+        "Total number of intent classifications served from cache",
+    )
+    yield format_gauge(
+        "intent_cache_misses_total",
+        metrics.intent_cache_misses,
+        "Total number of intent classifications sent to the LLM",
+    )
+    yield format_gauge(
+        "intent_llm_skipped_total",
+        metrics.intent_llm_skipped_total,
+        "Total number of intents classified by a confident heuristic without the LLM",
     )
-    output_lines.append("")
 
     # Calculate cache hit rate
     total_cache_ops = metrics.cache_hits + metrics.cache_misses
@@ -230,8 +197,20 @@ async def prometheus_metrics():
     else:
         hit_rate = 0
 
-    output_lines.append(
-        format_gauge("cache_hit_rate", hit_rate, "Cache hit rate (0-1)")
-    )
+    yield format_gauge("cache_hit_rate", hit_rate, "Cache hit rate (0-1)")
+
+
+def render_exposition() -> bytes:
+    # Format every family under the registry lock: label dicts gain keys
+    # from worker threads, and the scrape must not iterate them mid-insert.
+    # Each family is joined once (blank-line separated) and the body once.
+    with metrics._lock:
+        return b"".join(
+            ("\n".join(family) + "\n\n").encode() for family in metric_families()
+        )
 
-    return Response(content="\n".join(output_lines), media_type="text/plain")
+
+@router.get("")
+async def prometheus_metrics():
+    """Expose metrics in Prometheus format."""
+    return Response(render_exposition(), media_type="text/plain; version=0.0.4")
@@ -3,9 +3,13 @@ Observability and AgentOps plumbing for MCP agent system.
 Implements metrics, tracing, and cost tracking.
 """
 
+import os
+import threading
 import time
+from bisect import bisect_left
+from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, NamedTuple, Optional
 import logging
 
 
@@ -45,10 +49,69 @@ class QueryType(str, Enum):
 
 class LLMModel(str, Enum):
     LLAMA_70B = "llama-3.3-70b"
+    LLAMA_8B = "llama-3.1-8b"
 
 
 # Static cost table (per 1k tokens)
-COST_TABLE = {LLMModel.LLAMA_70B: {"input": 0.00059, "output": 0.00079}}
+COST_TABLE = {
+    LLMModel.LLAMA_70B: {"input": 0.00059, "output": 0.00079},
+    LLMModel.LLAMA_8B: {"input": 0.00005, "output": 0.00008},
+}
+
+# The same prices as integer nano-USD per token (USD per 1k tokens * 1e6),
+# so a request's cost is summed exactly and divided once
+_COST_NANO_PER_TOKEN = {
+    model: (round(c["input"] * 1_000_000), round(c["output"] * 1_000_000))
+    for model, c in COST_TABLE.items()
+}
+
+
+@dataclass
+class MCPResult:
+    """Metric deltas of one MCP request, applied together by record_mcp.
+
+    `rejected` is a mcp_rejected_requests_total label and `failure` an
+    agent_failures_total label; either is skipped when None.
+    """
+
+    status: str
+    duration: float
+    rejected: Optional[str] = None
+    failure: Optional[str] = None
+
+
+# Latency buckets in seconds (Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram: count, sum and per-bucket counts.
+
+    Memory and scrape cost are constant no matter how many observations
+    have been recorded.
+    """
+
+    __slots__ = ("buckets", "bucket_counts", "count", "sum")
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One slot per bucket plus a final +Inf slot
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Yield (le, cumulative count) pairs, ending with ("+Inf", count)."""
+        running = 0
+        for le, n in zip(self.buckets, self.bucket_counts):
+            running += n
+            yield le, running
+        yield "+Inf", self.count
 
 
 # Prometheus-compatible metrics (in-memory counters/histograms)
@@ -64,34 +127,80 @@ class MetricsRegistry:
         self.llm_calls_total: Dict[str, int] = {}
         self.llm_failures_total: Dict[str, int] = {}
 
-        # Histograms (store as list of observations)
-        self.agent_latency_seconds: Dict[str, list] = {}
-        self.mcp_latency_seconds: list = []
-        self.llm_latency_seconds: list = []
-        self.analysis_latency_seconds: list = []
+        # Histograms (bucketed; see Histogram)
+        self.agent_latency_seconds: Dict[str, Histogram] = {}
+        self.mcp_latency_seconds = Histogram()
+        self.llm_latency_seconds = Histogram()
+        self.analysis_latency_seconds = Histogram()
 
         # Gauges
         self.agent_active_requests: int = 0
         self.cache_hits: int = 0
         self.cache_misses: int = 0
+        self.intent_cache_hits: int = 0
+        self.intent_cache_misses: int = 0
+        self.intent_llm_skipped_total: int = 0
 
         # Cost tracking
         self.llm_tokens_total: Dict[str, int] = {}
         self.llm_cost_usd_total: Dict[str, float] = {}
 
-    def increment_counter(self, metric: Dict, key: str, value: int = 1):
-        """Increment a counter metric."""
+        # Running sums across all labels of the counters the dashboard
+        # reports, kept up to date by _add
+        self.agent_requests_sum: int = 0
+        self.agent_failures_sum: int = 0
+        self.llm_tokens_sum: int = 0
+        self.llm_cost_usd_sum: float = 0.0
+
+        # Counter and histogram updates are read-modify-write; analysis nodes
+        # run in worker threads (asyncio.to_thread) alongside the event loop,
+        # so serialize them
+        self._lock = threading.Lock()
+
+    def _add(self, metric: Dict, key: str, value):
+        # Caller holds self._lock
         metric[key] = metric.get(key, 0) + value
+        if metric is self.agent_requests_total:
+            self.agent_requests_sum += value
+        elif metric is self.agent_failures_total:
+            self.agent_failures_sum += value
+        elif metric is self.llm_tokens_total:
+            self.llm_tokens_sum += value
+        elif metric is self.llm_cost_usd_total:
+            self.llm_cost_usd_sum += value
+
+    def inc(self, attr: str, n: int = 1):
+        """Add `n` to a scalar gauge/counter attribute, e.g. inc("cache_hits")."""
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def increment_counter(self, metric: Dict, key: str, value: float = 1):
+        """Increment a counter metric."""
+        with self._lock:
+            self._add(metric, key, value)
+
+    def record_mcp(self, result: MCPResult):
+        """Record one MCP request's counters and latency in a single call."""
+        with self._lock:
+            self._add(self.mcp_requests_total, result.status, 1)
+            if result.rejected is not None:
+                self._add(self.mcp_rejected_requests_total, result.rejected, 1)
+            if result.failure is not None:
+                self._add(self.agent_failures_total, result.failure, 1)
+            self.mcp_latency_seconds.observe(result.duration)
 
     def record_histogram(self, metric: Dict, key: str, value: float):
         """Record a histogram observation."""
-        if key not in metric:
-            metric[key] = []
-        metric[key].append(value)
+        with self._lock:
+            hist = metric.get(key)
+            if hist is None:
+                hist = metric[key] = Histogram()
+            hist.observe(value)
 
-    def record_simple_histogram(self, metric: list, value: float):
-        """Record to a simple list-based histogram."""
-        metric.append(value)
+    def record_simple_histogram(self, metric: Histogram, value: float):
+        """Record to an unlabelled histogram."""
+        with self._lock:
+            metric.observe(value)
 
 
 # Global metrics registry
@@ -110,15 +219,16 @@ class Span:
         self.trace_id = trace_id or self._generate_id()
         self.parent_id = parent_id
         self.span_id = self._generate_id()
-        self.start_time = time.time()
+        # Monotonic clock: start/end only ever feed the span duration
+        self.start_time = time.perf_counter()
         self.end_time: Optional[float] = None
         self.attributes: Dict[str, Any] = {}
         self.status = "ok"
 
-    def _generate_id(self) -> str:
-        import uuid
-
-        return str(uuid.uuid4())[:16]
+    @staticmethod
+    def _generate_id() -> str:
+        # 64 random bits as 16 hex chars (the OpenTelemetry span-id size)
+        return os.urandom(8).hex()
 
     def set_attribute(self, key: str, value: Any):
         """Set a span attribute (low cardinality only)."""
@@ -130,7 +240,7 @@ class Span:
 
     def end(self):
         """End the span and record duration."""
-        self.end_time = time.time()
+        self.end_time = time.perf_counter()
         duration = self.end_time - self.start_time
         logger.debug(f"Span {self.name} ended: {duration:.4f}s")
         return duration
@@ -163,13 +273,9 @@ tracer = Tracer()
 
 def estimate_llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
     """Estimate LLM cost based on static pricing table."""
-    model_key = LLMModel.LLAMA_70B if "llama" in model.lower() else LLMModel.LLAMA_70B
-    costs = COST_TABLE.get(model_key, {"input": 0.001, "output": 0.001})
-
-    input_cost = (prompt_tokens / 1000) * costs["input"]
-    output_cost = (completion_tokens / 1000) * costs["output"]
-
-    return round(input_cost + output_cost, 6)
+    model_key = LLMModel.LLAMA_8B if "8b" in model.lower() else LLMModel.LLAMA_70B
+    input_nano, output_nano = _COST_NANO_PER_TOKEN[model_key]
+    return (prompt_tokens * input_nano + completion_tokens * output_nano) / 1e9
 
 
 def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int):
@@ -180,9 +286,55 @@ def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int):
     # Record tokens
     metrics.increment_counter(metrics.llm_tokens_total, model, total_tokens)
     # Record cost
-    if model not in metrics.llm_cost_usd_total:
-        metrics.llm_cost_usd_total[model] = 0.0
-    metrics.llm_cost_usd_total[model] += cost
+    metrics.increment_counter(metrics.llm_cost_usd_total, model, cost)
+
+
+def record_node_result(
+    span: Span,
+    node_type: NodeType,
+    duration: float,
+    outcome: str = "success",
+    query_type: Optional[str] = None,
+    failure: Optional[FailureReason] = None,
+    extra: Optional[Dict[str, Any]] = None,
+):
+    """Record a node exit (latency, counters, span) in one call.
+
+    `query_type` counts the request under agent_requests_total, `failure`
+    counts it under agent_failures_total and marks the span as errored,
+    and `extra` is copied onto the span as attributes.
+    """
+    metrics.record_histogram(metrics.agent_latency_seconds, node_type.value, duration)
+    if node_type == NodeType.ANALYSIS:
+        metrics.record_simple_histogram(metrics.analysis_latency_seconds, duration)
+    if query_type is not None:
+        metrics.increment_counter(metrics.agent_requests_total, query_type)
+    if failure is not None:
+        metrics.increment_counter(
+            metrics.agent_failures_total, f"{node_type.value}:{failure.value}"
+        )
+        span.set_status("error")
+    span.set_attribute("outcome", outcome)
+    if extra:
+        span.attributes.update(extra)
+    tracer.end_span(span)
+
+
+class MetricsTotals(NamedTuple):
+    agent_requests: int
+    agent_failures: int
+    llm_tokens: int
+    llm_cost_usd: float
+
+
+def get_metrics_totals() -> MetricsTotals:
+    """Label-summed counter totals, kept up to date on every increment."""
+    return MetricsTotals(
+        agent_requests=metrics.agent_requests_sum,
+        agent_failures=metrics.agent_failures_sum,
+        llm_tokens=metrics.llm_tokens_sum,
+        llm_cost_usd=metrics.llm_cost_usd_sum,
+    )
 
 
 def get_metrics_summary() -> Dict[str, Any]:
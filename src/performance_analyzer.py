@@ -1,5 +1,10 @@
 import logging
 
+try:
+    import numpy as np  # optional: vectorized class ranking/statistics
+except ImportError:
+    np = None
+
 logger = logging.getLogger("performance_analyzer")
 
 
@@ -93,10 +98,10 @@ def derived_metrics(doc: dict, student_id: str = None) -> dict:
     if g3 < 10:
         alerts.append(f"at_risk: final grade {g3}")
     
-    # Provide a risk level string
+    # Provide a risk level string (high on the at-risk or attendance alert)
     if not alerts:
         risk = "low"
-    elif any("at_risk" in a or "attendance_alert" in a for a in alerts):
+    elif g3 < 10 or absences > 10:
         risk = "high"
     else:
         risk = "medium"
@@ -124,6 +129,25 @@ def _grades_sparkline(grades: list) -> str:
     return "".join(chars)
 
 
+def _stable_top(neg, k: int):
+    """Indices of the k smallest values of `neg`, in stable ascending order.
+
+    Equivalent to np.argsort(neg, kind="stable")[:k] but partitions first,
+    so only about k elements are sorted. Ties at the cut-off are taken in
+    index order, as a stable sort would.
+    """
+    n = len(neg)
+    if k >= n:
+        return np.argsort(neg, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    cut = np.partition(neg, k - 1)[k - 1]
+    below = np.flatnonzero(neg < cut)
+    ties = np.flatnonzero(neg == cut)[: k - len(below)]
+    sel = np.sort(np.concatenate((below, ties)))
+    return sel[np.argsort(neg[sel], kind="stable")]
+
+
 def class_analysis(students: list, top_n: int = 10, page: int = 1, grade_threshold: int | None = None, at_risk_only: bool = False) -> str:
     """
     Analyze a class/dataset: rank by G3, detect at-risk students.
@@ -139,36 +163,79 @@ def class_analysis(students: list, top_n: int = 10, page: int = 1, grade_thresho
     if at_risk_only:
         filtered = [s for s in filtered if s.get("G3", 0) < 10]
 
-    sorted_students = sorted(filtered, key=lambda s: s.get("G3", 0), reverse=True)
-    at_risk = [s for s in sorted_students if s.get("G3", 0) < 10]
-
     # Pagination
     start = (page - 1) * top_n
     end = start + top_n
-    page_students = sorted_students[start:end]
+    total = len(filtered)
 
-    summary = f"Class ranking by final grade (G3) — page {page} (showing {len(page_students)}):\n"
-    for i, s in enumerate(page_students, start + 1):
-        sid = s.get("_id", "unknown")
-        name = s.get("name") or sid
-        g3 = s.get("G3", "N/A")
-        summary += f"{i}. {name} ({sid}): {g3}\n"
+    if np is not None:
+        # Only the first `end` ranks are printed: partition them out and
+        # sort just those, keeping the tie order of a stable sort
+        neg = -np.fromiter(
+            (s.get("G3", 0) for s in filtered), dtype=np.float64, count=total
+        )
+        head = _stable_top(neg, end)
+        page_students = [filtered[i] for i in head[start:end].tolist()]
+        risk = np.flatnonzero(neg > -10)
+        risk = risk[np.argsort(neg[risk], kind="stable")]
+        at_risk = [filtered[i] for i in risk.tolist()]
+    else:
+        sorted_students = sorted(
+            filtered, key=lambda s: s.get("G3", 0), reverse=True
+        )
+        at_risk = [s for s in sorted_students if s.get("G3", 0) < 10]
+        page_students = sorted_students[start:end]
+
+    # Collect the lines and join once instead of growing one string
+    parts = [
+        f"Class ranking by final grade (G3) — page {page} (showing {len(page_students)}):\n"
+    ]
+    parts.extend(
+        f"{i}. {s.get('name') or s.get('_id', 'unknown')} "
+        f"({s.get('_id', 'unknown')}): {s.get('G3', 'N/A')}\n"
+        for i, s in enumerate(page_students, start + 1)
+    )
 
-    if end < len(sorted_students):
-        summary += f"... and {len(sorted_students) - end} more students\n"
+    if end < total:
+        parts.append(f"... and {total - end} more students\n")
 
     if at_risk:
-        summary += f"\nAt-risk students ({len(at_risk)}):\n"
-        for s in at_risk[:50]:
-            name = s.get("name") or s.get("_id", "unknown")
-            g3 = s.get("G3", "N/A")
-            summary += f"  - {name} ({s.get('_id', 'unknown')}): {g3}\n"
+        parts.append(f"\nAt-risk students ({len(at_risk)}):\n")
+        parts.extend(
+            f"  - {s.get('name') or s.get('_id', 'unknown')} "
+            f"({s.get('_id', 'unknown')}): {s.get('G3', 'N/A')}\n"
+            for s in at_risk[:50]
+        )
         if len(at_risk) > 50:
-            summary += f"  ... and {len(at_risk) - 50} more at-risk students\n"
+            parts.append(f"  ... and {len(at_risk) - 50} more at-risk students\n")
     else:
-        summary += "\nNo at-risk students detected.\n"
+        parts.append("\nNo at-risk students detected.\n")
 
-    return summary
+    return "".join(parts)
+
+
+def _grade_stats(grades: list, g3=None) -> tuple:
+    """(average, highest, lowest, at-risk count) of a non-empty grade list.
+
+    With NumPy the reductions run over one float64 array (`g3` if the
+    caller already built it); highest/lowest are read back from `grades`
+    so they print exactly as the stored values.
+    """
+    if np is None:
+        return (
+            sum(grades) / len(grades),
+            max(grades),
+            min(grades),
+            sum(1 for g in grades if g < 10),
+        )
+    if g3 is None:
+        g3 = np.fromiter(grades, dtype=np.float64, count=len(grades))
+    return (
+        float(g3.sum()) / len(grades),
+        grades[int(g3.argmax())],
+        grades[int(g3.argmin())],
+        int(np.count_nonzero(g3 < 10)),
+    )
 
 
 def class_summary_statistics(students: list) -> str:
@@ -182,10 +249,7 @@ def class_summary_statistics(students: list) -> str:
     if not grades:
         return "No grade data available."
     
-    avg_grade = sum(grades) / len(grades)
-    max_grade = max(grades)
-    min_grade = min(grades)
-    at_risk_count = len([g for g in grades if g < 10])
+    avg_grade, max_grade, min_grade, at_risk_count = _grade_stats(grades)
     
     summary = (
         f"Class statistics (n={len(students)}):\n"
@@ -194,3 +258,78 @@ def class_summary_statistics(students: list) -> str:
         f"At-risk students: {at_risk_count} ({100*at_risk_count/len(students):.1f}%)"
     )
     return summary
+
+
+def class_report(students: list, top_n: int = 10) -> str:
+    """
+    Class ranking plus summary statistics from one read of the records.
+
+    Same text as class_analysis(students, top_n) + "\n\n" +
+    class_summary_statistics(students). G3 is fetched once per student and
+    the class is sorted once (in NumPy when it is installed); the at-risk
+    list is the tail of that order.
+    """
+    if not students:
+        return "No student data available."
+
+    n = len(students)
+    raw = [s.get("G3") for s in students]
+    grades = [g for g in raw if g is not None]
+    keys = raw if len(grades) == n else [0 if g is None else g for g in raw]
+
+    if np is not None:
+        # Pack G3 into one float64 array and rank/count in C; a stable
+        # argsort on -G3 keeps class_analysis' ordering of ties
+        g3 = np.array(keys, dtype=np.float64)
+        order = np.argsort(-g3, kind="stable")
+        risk_total = int(np.count_nonzero(g3 < 10))
+        top = order[:top_n].tolist()
+        at_risk = order[n - risk_total:].tolist() if risk_total else []
+    else:
+        # sorted() is stable, matching class_analysis' ordering of ties
+        g3 = None
+        order = sorted(range(n), key=keys.__getitem__, reverse=True)
+        risk_total = sum(1 for k in keys if k < 10)
+        top = order[:top_n]
+        at_risk = order[n - risk_total:] if risk_total else []
+
+    parts = [
+        f"Class ranking by final grade (G3) — page 1 (showing {len(top)}):\n"
+    ]
+    for rank, i in enumerate(top, 1):
+        s = students[i]
+        sid = s.get("_id", "unknown")
+        name = s.get("name") or sid
+        parts.append(f"{rank}. {name} ({sid}): {s.get('G3', 'N/A')}\n")
+
+    if top_n < n:
+        parts.append(f"... and {n - top_n} more students\n")
+
+    if at_risk:
+        parts.append(f"\nAt-risk students ({len(at_risk)}):\n")
+        for i in at_risk[:50]:
+            s = students[i]
+            name = s.get("name") or s.get("_id", "unknown")
+            parts.append(
+                f"  - {name} ({s.get('_id', 'unknown')}): {s.get('G3', 'N/A')}\n"
+            )
+        if len(at_risk) > 50:
+            parts.append(f"  ... and {len(at_risk) - 50} more at-risk students\n")
+    else:
+        parts.append("\nNo at-risk students detected.\n")
+
+    parts.append("\n\n")
+    if not grades:
+        parts.append("No grade data available.")
+    else:
+        # Without missing G3s the ranking array already holds every grade
+        avg_grade, max_grade, min_grade, at_risk_count = _grade_stats(
+            grades, g3 if keys is raw else None
+        )
+        parts.append(
+            f"Class statistics (n={n}):\n"
+            f"Average final grade: {avg_grade:.1f}\n"
+            f"Highest: {max_grade}, Lowest: {min_grade}\n"
+            f"At-risk students: {at_risk_count} ({100*at_risk_count/n:.1f}%)"
+        )
+    return "".join(parts)
@@ -0,0 +1,184 @@
+"""
+Response cache for read-mostly API routes.
+
+Backed by Redis when REDIS_URL is set and redis is installed, so every
+worker shares one cache; otherwise an in-process TTL cache is used.
+Cache errors never fail a request: the route simply runs uncached.
+"""
+
+import os
+import time
+import logging
+import functools
+import hmac
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import redis.asyncio as aioredis  # optional: shared cache across workers
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger("response_cache")
+
+CACHE_PREFIX = "mcp"
+REDIS_URL = os.getenv("REDIS_URL")
+# /admin/cache/* is only served when a token is configured
+CACHE_ADMIN_TOKEN = os.getenv("CACHE_ADMIN_TOKEN")
+
+_LOCAL_CACHE_MAX = 512
+_local_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_redis = None
+
+if REDIS_URL and aioredis is not None:
+    _redis = aioredis.from_url(REDIS_URL)
+    logger.info("Response cache: using Redis")
+else:
+    logger.info("Response cache: using in-process TTL cache")
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    if _redis is not None:
+        try:
+            return await _redis.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache get failed: {e}")
+            return None
+    entry = _local_cache.get(key)
+    if entry is None:
+        return None
+    expires, value = entry
+    if time.monotonic() > expires:
+        del _local_cache[key]
+        return None
+    _local_cache.move_to_end(key)
+    return value
+
+
+async def cache_set(key: str, value: bytes, expire: int):
+    if _redis is not None:
+        try:
+            await _redis.set(key, value, ex=expire)
+        except Exception as e:
+            logger.warning(f"Response cache set failed: {e}")
+        return
+    _local_cache[key] = (time.monotonic() + expire, value)
+    _local_cache.move_to_end(key)
+    if len(_local_cache) > _LOCAL_CACHE_MAX:
+        _local_cache.popitem(last=False)
+
+
+async def cache_get_many(keys: List[str]) -> List[Optional[bytes]]:
+    """cache_get for several keys; one MGET round trip with Redis."""
+    if _redis is not None:
+        try:
+            return await _redis.mget(keys)
+        except Exception as e:
+            logger.warning(f"Response cache get failed: {e}")
+            return [None] * len(keys)
+    return [await cache_get(k) for k in keys]
+
+
+async def cache_set_many(items: Dict[str, bytes], expire: int):
+    """cache_set for several keys; one pipelined round trip with Redis."""
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Response cache set failed: {e}")
+        return
+    for key, value in items.items():
+        await cache_set(key, value, expire)
+
+
+async def cache_clear() -> int:
+    """Drop every cached response; returns the number of keys removed."""
+    if _redis is not None:
+        removed = 0
+        try:
+            async for key in _redis.scan_iter(match=f"{CACHE_PREFIX}:*"):
+                removed += await _redis.delete(key)
+        except Exception as e:
+            logger.warning(f"Response cache clear failed: {e}")
+        return removed
+    removed = len(_local_cache)
+    _local_cache.clear()
+    return removed
+
+
+def _default_key(*args, **kwargs) -> Any:
+    return jsonable_encoder([args, kwargs])
+
+
+def cached(
+    expire: int = 30,
+    key: Optional[Callable[..., Any]] = None,
+    model: Optional[type] = None,
+):
+    """Cache an async route's result for `expire` seconds.
+
+    `key` maps the route's arguments to a JSON-able cache key (defaults to
+    all of them). With `model`, hits are rebuilt as that Pydantic model so
+    callers that await the route directly get the same type back.
+    A None result (e.g. not found) is never cached, so a record that
+    appears right after a miss is served on the next call.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            parts = (key or _default_key)(*args, **kwargs)
+            cache_key = f"{CACHE_PREFIX}:{func.__name__}:" + orjson.dumps(
+                parts, option=orjson.OPT_SORT_KEYS
+            ).decode()
+
+            hit = await cache_get(cache_key)
+            if hit is not None:
+                value = orjson.loads(hit)
+                return model.parse_obj(value) if model is not None else value
+
+            result = await func(*args, **kwargs)
+            if result is not None:
+                await cache_set(
+                    cache_key, orjson.dumps(jsonable_encoder(result)), expire
+                )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    # Without CACHE_ADMIN_TOKEN the admin routes do not exist
+    if not CACHE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token, CACHE_ADMIN_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin/cache",
+    tags=["cache"],
+    dependencies=[Depends(require_admin_token)],
+)
+
+
+@router.post("/invalidate")
+async def invalidate_cache():
+    """Clear this process's cached responses (every worker's with Redis).
+
+    Requires the X-Admin-Token header to match CACHE_ADMIN_TOKEN.
+    """
+    removed = await cache_clear()
+    logger.info(f"Response cache invalidated - removed={removed}")
+    return {"invalidated": removed}